@@ -1,18 +1,49 @@
-import joblib
-import numpy as np
-import pandas as pd
-from flask import Flask, request, jsonify, render_template_string
+import os
+import sys
+import hmac
+import json
+import sqlite3
+import threading
+import time
+from flask import Flask, Response, g, request, jsonify, render_template_string, stream_with_context
+
+# Shared prediction code lives in src/ next to the training scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from inference import ModelBundle, parse_symptoms, representative_cases
+from admission import AdmissionController, request_deadline
+from next_symptom import entropy
+from request_log import LOG_DIR, RequestLogger
+from prediction_cache import CACHE_PATH, PredictionCache
+from model_registry import ModelRegistry
+from shadow import load_shadow
+from sessions import SessionStore
+from profiling import RequestProfiler
+import serialization
 
 # --------------------------------------------------
 # Load Model Artifacts
 # --------------------------------------------------
 
-model = joblib.load("models/disease_model.pkl")
-label_encoder = joblib.load("models/label_encoder.pkl")
-feature_columns = joblib.load("models/feature_columns.pkl")
+bundle = ModelBundle()
 
-clean_feature_columns = [col.strip().lower() for col in feature_columns]
-feature_map = dict(zip(clean_feature_columns, feature_columns))
+# One BLAS/OpenMP thread per worker; concurrency comes from the web server's threads
+bundle.thread_policy.limit_native_threads()
+print(f"Thread policy: {bundle.thread_policy.describe()}")
+
+# Top-5 results shared by every worker process through one SQLite file (survives restarts)
+try:
+    prediction_cache = PredictionCache(CACHE_PATH, bundle.version, bundle.n_features)
+except (OSError, sqlite3.Error) as exc:
+    print(f"Prediction cache disabled: {exc}")
+    prediction_cache = None
+
+# Named variants published with src/model_registry.py, loaded on first use and evicted LRU
+DEFAULT_MODEL = "default"
+registry = ModelRegistry(thread_policy=bundle.thread_policy)
+
+# Candidate model run on background threads against live traffic (SHADOW_MODEL_DIR), or None
+shadow = load_shadow(bundle)
 
 # --------------------------------------------------
 # Flask App
@@ -220,6 +251,7 @@ HTML_TEMPLATE = """<!DOCTYPE html>
       transition: background .12s;
       user-select: none;
     }
+    .ms-option[hidden] { display: none; }
     .ms-option:hover  { background: #f8faf9; }
     .ms-option.active { background: var(--accent-lt); color: var(--accent-dk); }
 
@@ -517,15 +549,37 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 <script>
 // ── State ────────────────────────────────────────────────
 let ALL_SYMPTOMS = [];
+let SEARCH_INDEX = [];      // lowercase names, same order as ALL_SYMPTOMS
+let OPTION_NODES = [];      // one option element per symptom, built once
+let OPTION_INDEX = new Map();
 let selected = new Set();
 
 // ── Bootstrap ────────────────────────────────────────────
-fetch('/symptoms')
-  .then(r => r.json())
-  .then(d => {
-    ALL_SYMPTOMS = d.symptoms;
-    renderOptions(ALL_SYMPTOMS);
-  });
+// The vocabulary is cached in localStorage and only fetched again when the model version changes
+const VOCAB_VERSION = '{{ vocabulary_version }}';
+const VOCAB_KEY = 'disease-predictor:vocabulary';
+
+function loadVocabulary() {
+  try {
+    const cached = JSON.parse(localStorage.getItem(VOCAB_KEY) || 'null');
+    if (cached && cached.version === VOCAB_VERSION) return Promise.resolve(cached.symptoms);
+  } catch (e) { /* unreadable cache: fetch again */ }
+
+  return fetch('/symptoms')
+    .then(r => r.json())
+    .then(d => {
+      try {
+        localStorage.setItem(VOCAB_KEY, JSON.stringify({ version: d.version, symptoms: d.symptoms }));
+      } catch (e) { /* storage full or disabled: works uncached */ }
+      return d.symptoms;
+    });
+}
+
+loadVocabulary().then(symptoms => {
+  ALL_SYMPTOMS = symptoms;
+  SEARCH_INDEX = symptoms.map(s => s.toLowerCase());
+  buildOptions();
+});
 
 // ── Dropdown open/close ──────────────────────────────────
 function openDropdown() {
@@ -546,26 +600,37 @@ function focusSearch() {
   document.getElementById('searchInput').focus();
 }
 
-// ── Render option list ───────────────────────────────────
-function renderOptions(symptoms) {
-  const query = document.getElementById('searchInput').value.toLowerCase();
+// ── Build option list (once) ─────────────────────────────
+function buildOptions() {
   const container = document.getElementById('optionsList');
+  const fragment = document.createDocumentFragment();
+
+  OPTION_NODES = ALL_SYMPTOMS.map((s, i) => {
+    const node = document.createElement('div');
+    node.className = 'ms-option';
+    node.dataset.value = s;
+    node.innerHTML = '<div class="ms-check"></div><div class="ms-option-text"></div>';
+    node.lastChild.textContent = s;
+    node.dataset.query = '';
+    OPTION_INDEX.set(s, i);
+    fragment.appendChild(node);
+    return node;
+  });
+  container.replaceChildren(fragment);
+
+  // Use mousedown + preventDefault so the input never loses focus,
+  // which prevents the outsideClick handler from firing and closing the dropdown.
+  container.addEventListener('mousedown', e => {
+    const option = e.target.closest('.ms-option');
+    if (!option) return;
+    e.preventDefault();
+    toggleSymptom(option.dataset.value);
+  });
+}
 
-  container.innerHTML = symptoms.map(s => {
-    const active = selected.has(s) ? 'active' : '';
-    const label  = highlight(s, query);
-    // Use mousedown + preventDefault so the input never loses focus,
-    // which prevents the outsideClick handler from firing and closing the dropdown.
-    return `
-      <div class="ms-option ${active}" data-value="${s}"
-           onmousedown="event.preventDefault(); toggleSymptom('${s}')">
-        <div class="ms-check"></div>
-        <div class="ms-option-text">${label}</div>
-      </div>`;
-  }).join('');
-
-  document.getElementById('noResults').style.display =
-    symptoms.length === 0 ? 'block' : 'none';
+function markOption(s) {
+  const i = OPTION_INDEX.get(s);
+  if (i !== undefined) OPTION_NODES[i].classList.toggle('active', selected.has(s));
 }
 
 function highlight(text, query) {
@@ -577,43 +642,88 @@ function highlight(text, query) {
     + text.slice(idx + query.length);
 }
 
-// ── Filter ───────────────────────────────────────────────
+// ── Filter (debounced, incremental) ─────────────────────
+const FILTER_DELAY_MS = 120;
+const RENDER_CHUNK = 300;   // options updated per animation frame
+let filterTimer = null;
+let renderPass = 0;
+
+function searchQuery() {
+  return document.getElementById('searchInput').value.trim().toLowerCase().replace(/ +/g, '_');
+}
+
 function filterOptions() {
-  const q = document.getElementById('searchInput').value.toLowerCase();
-  const filtered = ALL_SYMPTOMS.filter(s => s.includes(q));
-  renderOptions(filtered);
   openDropdown();
+  clearTimeout(filterTimer);
+  filterTimer = setTimeout(() => applyFilter(searchQuery()), FILTER_DELAY_MS);
+}
+
+function applyFilter(query) {
+  // Only options whose visibility or highlight changes are touched, a chunk per frame,
+  // and a newer query abandons the pass still running for an older one
+  clearTimeout(filterTimer);
+  const pass = ++renderPass;
+  let i = 0, shown = 0;
+
+  function step() {
+    if (pass !== renderPass) return;
+    const end = Math.min(i + RENDER_CHUNK, OPTION_NODES.length);
+    for (; i < end; i++) {
+      const node  = OPTION_NODES[i];
+      const match = !query || SEARCH_INDEX[i].includes(query);
+      if (node.hidden === match) node.hidden = !match;
+      if (!match) continue;
+      shown++;
+      if (node.dataset.query !== query) {
+        node.dataset.query = query;
+        node.lastChild.innerHTML = highlight(ALL_SYMPTOMS[i], query);
+      }
+    }
+    if (i < OPTION_NODES.length) {
+      requestAnimationFrame(step);
+    } else {
+      document.getElementById('noResults').style.display = shown === 0 ? 'block' : 'none';
+    }
+  }
+  step();
 }
 
 // ── Toggle selection ─────────────────────────────────────
 function toggleSymptom(s) {
   if (selected.has(s)) {
     selected.delete(s);
+    liveUpdate([], [s]);
   } else {
     selected.add(s);
+    liveUpdate([s], []);
   }
+  markOption(s);
   // Clear the search text after selecting so the user sees the full list again
   document.getElementById('searchInput').value = '';
   syncTags();
-  renderOptions(ALL_SYMPTOMS);
+  applyFilter('');
 }
 
 function removeTag(s) {
   selected.delete(s);
+  liveUpdate([], [s]);
+  markOption(s);
   syncTags();
-  renderOptions(ALL_SYMPTOMS);
 }
 
 function clearAll() {
+  const cleared = [...selected];
+  liveUpdate([], cleared);
   selected.clear();
+  cleared.forEach(markOption);
   document.getElementById('searchInput').value = '';
   syncTags();
-  renderOptions(ALL_SYMPTOMS);
+  applyFilter('');
 }
 
 function getFiltered() {
-  const q = document.getElementById('searchInput').value.toLowerCase();
-  return q ? ALL_SYMPTOMS.filter(s => s.includes(q)) : ALL_SYMPTOMS;
+  const q = searchQuery();
+  return q ? ALL_SYMPTOMS.filter((s, i) => SEARCH_INDEX[i].includes(q)) : ALL_SYMPTOMS;
 }
 
 // ── Sync tags in input row ───────────────────────────────
@@ -642,11 +752,60 @@ function syncTags() {
   // Update placeholder
   input.placeholder = n === 0 ? 'Search symptoms…' : 'Add more…';
 
-  // Hide result + error when selection changes
-  document.getElementById('result').style.display = 'none';
+  // Hide result + error when selection changes (a live session streams the new result)
+  if (!session) document.getElementById('result').style.display = 'none';
   document.getElementById('errorBox').style.display = 'none';
 }
 
+// ── Live session ─────────────────────────────────────────
+// The server keeps the selection and streams a new top 5 after every change
+let session = null;
+let sessionQueue = Promise.resolve();
+
+function liveUpdate(add, remove) {
+  // Changes are sent one after another so the server applies them in order
+  sessionQueue = sessionQueue.then(() => sendUpdate(add, remove)).catch(() => {});
+}
+
+async function sendUpdate(add, remove) {
+  if (session) {
+    const res = await fetch(`/session/${session.id}/symptoms`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ add, remove }),
+    });
+    if (res.ok) showLive(await res.json());
+    if (res.status !== 404) return;
+    closeSession();   // expired on the server: start over with the full selection
+  }
+  if (selected.size === 0) return;
+
+  const res = await fetch('/session', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ symptoms: [...selected].join(', ') }),
+  });
+  if (!res.ok) return;
+  const data = await res.json();
+  showLive(data);   // the stream may be refused when the server is at its stream limit
+  session = { id: data.session_id, stream: new EventSource(`/session/${data.session_id}/stream`) };
+  session.stream.addEventListener('prediction', e => showLive(JSON.parse(e.data)));
+  session.stream.addEventListener('closed', closeSession);
+}
+
+function closeSession() {
+  if (session) session.stream.close();
+  session = null;
+}
+
+function showLive(snapshot) {
+  if (snapshot.prediction) {
+    showPrediction(snapshot.prediction);
+  } else {
+    document.getElementById('result').style.display = 'none';
+  }
+}
+
 // ── Keyboard: backspace deletes last tag ────────────────
 function handleKeydown(e) {
   if (e.key === 'Backspace' && e.target.value === '' && selected.size > 0) {
@@ -683,6 +842,18 @@ async function predict() {
 
     if (data.error) { showError(data.error); return; }
 
+    showPrediction(data);
+    result.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+
+  } catch(e) {
+    showError('Request failed. Please check the server is running.');
+  } finally {
+    btn.disabled = false;
+    btn.textContent = 'Predict Disease';
+  }
+}
+
+function showPrediction(data) {
     // Hero
     document.getElementById('rDisease').textContent = data.predicted_disease;
     document.getElementById('confFill').style.width  = data.confidence + '%';
@@ -705,15 +876,7 @@ async function predict() {
         <div class="top5-pct">${item.probability.toFixed(1)}%</div>
       </div>`).join('');
 
-    result.style.display = 'block';
-    result.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
-
-  } catch(e) {
-    showError('Request failed. Please check the server is running.');
-  } finally {
-    btn.disabled = false;
-    btn.textContent = 'Predict Disease';
-  }
+    document.getElementById('result').style.display = 'block';
 }
 
 function showError(msg) {
@@ -732,12 +895,74 @@ function showError(msg) {
 
 @app.route("/")
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    # The page carries the vocabulary version, so a cached vocabulary is reused without a request
+    return render_template_string(HTML_TEMPLATE, vocabulary_version=bundle.version)
+
+
+# Sorted once; the vocabulary is fixed for the model's lifetime
+SORTED_SYMPTOMS = sorted(bundle.clean_feature_columns)
 
 
 @app.route("/symptoms", methods=["GET"])
 def list_symptoms():
-    return jsonify({"symptoms": sorted(clean_feature_columns)})
+    # Tagged with the model version; a client holding this version gets 304 Not Modified
+    response = jsonify({"symptoms": SORTED_SYMPTOMS, "version": bundle.version})
+    response.set_etag(bundle.version)
+    return response.make_conditional(request)
+
+
+@app.route("/diseases", methods=["GET"])
+def list_diseases():
+    # Column order of full distributions and raw float32 responses
+    return jsonify({"diseases": bundle.classes.tolist()})
+
+
+@app.route("/evaluation", methods=["GET"])
+def evaluation_report():
+    # Hold-out metrics saved by train_model.py, read instead of recomputed
+    if bundle.report is None:
+        return jsonify({"error": "Evaluation report missing. Re-run src/train_model.py."}), 503
+    return jsonify(bundle.report)
+
+
+def select_model(data):
+    """(bundle, None) for a request's "model" / "model_version" fields (the app's own by default),
+    or (None, error response) when the model is unknown or fails to load"""
+    name = data.get("model") or DEFAULT_MODEL
+    version = data.get("model_version") or None
+    if not isinstance(name, str) or not isinstance(version, (str, type(None))):
+        return None, (jsonify({"error": "'model' and 'model_version' must be strings."}), 400)
+    if name == DEFAULT_MODEL and version in (None, bundle.version):
+        selected = bundle
+    else:
+        try:
+            key = registry.resolve(name, version)
+        except KeyError:
+            label = f"{name}@{version}" if version else name
+            return None, (jsonify({"error": f"Unknown model '{label}'. See GET /models."}), 404)
+        try:
+            selected = registry.get(*key)
+        except Exception as exc:
+            # A published bundle that cannot be loaded is a server fault, not an unknown model
+            print(f"Model registry: failed to load {key[0]}@{key[1]}: {exc!r}")
+            return None, (jsonify({"error": f"Model '{key[0]}@{key[1]}' is unavailable."}), 503)
+    g.model = (name, selected.version)
+    return selected, None
+
+
+def mirror_to_shadow(selected, index_lists, results):
+    """Hands the default model's answers to the shadow candidate without waiting for it"""
+    if shadow is not None and selected is bundle and not is_warm_up():
+        shadow.submit(index_lists, results)
+
+
+def respond(payload, proba, mimetype):
+    """Encodes a prediction payload in the negotiated response format"""
+    if mimetype == serialization.FLOAT32_MIMETYPE:
+        response = Response(serialization.encode_float32(proba), mimetype=mimetype)
+        response.headers["X-Shape"] = ",".join(str(n) for n in proba.shape)
+        return response
+    return Response(serialization.encode(payload, mimetype), mimetype=mimetype)
 
 
 @app.route("/predict", methods=["POST"])
@@ -745,53 +970,604 @@ def predict():
     data = request.get_json(force=True)
     user_input = data.get("symptoms", "").strip()
 
+    selected, error = select_model(data)
+    if error:
+        return error
+
     if not user_input:
         return jsonify({"error": "No symptoms provided."}), 400
 
-    input_symptoms = [
-        sym.strip().lower().replace(" ", "_")
-        for sym in user_input.split(",")
-        if sym.strip()
-    ]
-
-    input_data = pd.DataFrame(0, index=[0], columns=feature_columns)
-    recognized, unrecognized = [], []
-
-    for symptom in input_symptoms:
-        if symptom in feature_map:
-            input_data.loc[0, feature_map[symptom]] = 1
-            recognized.append(symptom)
-        else:
-            unrecognized.append(symptom)
+    indices, recognized, unrecognized = selected.resolve(parse_symptoms(user_input))
 
     if not recognized:
         return jsonify({
             "error": f"No valid symptoms recognized. Unrecognized: {', '.join(unrecognized)}"
         }), 400
 
-    prediction       = model.predict(input_data)
-    prediction_proba = model.predict_proba(input_data)[0]
-    predicted_disease = label_encoder.inverse_transform(prediction)[0]
-    confidence        = float(np.max(prediction_proba) * 100)
+    mimetype = serialization.negotiate(request.accept_mimetypes)
+
+    if data.get("explain") and selected.contributions is None:
+        return jsonify({"error": "Contribution data missing. Re-run src/explain.py (forest models only)."}), 503
+
+    # 1-2 symptoms are answered from the precomputed table, larger sets from the shared
+    # cache (default model only), unless more than the top 5 is needed
+    shared_cache = prediction_cache if selected is bundle else None
+    cacheable = not (data.get("distribution") or data.get("explain")) and mimetype != serialization.FLOAT32_MIMETYPE
+    if cacheable:
+        hit, source = selected.lookup(indices), "table"
+        if hit is None and shared_cache is not None:
+            hit, source = shared_cache.get(indices), "cache"
+        if hit is not None:
+            result = selected.format_result(*hit, recognized, unrecognized)
+            mirror_to_shadow(selected, [indices], [result])
+            g.prediction = (source, result)
+            return respond(result, None, mimetype)
+
+    # Explanations come from the same tree traversal that produces the probabilities
+    explanation = None
+    if data.get("explain"):
+        proba, explanation = selected.explain(indices)
+    else:
+        proba = selected.predict_indices([indices])
+    result = selected.build_result(proba[0], recognized, unrecognized)
+    if explanation is not None:
+        result["explanation"] = explanation
+
+    if cacheable and shared_cache is not None:
+        top_indices, top_proba = selected.top_k(proba[0])
+        shared_cache.put(indices, top_indices[0], top_proba[0])
+
+    # Full distribution (column order from /diseases) on request
+    if data.get("distribution"):
+        result["probabilities"] = proba[0] * 100
+
+    mirror_to_shadow(selected, [indices], [result])
+    g.prediction = ("model", result)
+    return respond(result, proba, mimetype)
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    data = request.get_json(force=True)
+    cases = data.get("cases")
+
+    selected, error = select_model(data)
+    if error:
+        return error
+
+    if not isinstance(cases, list) or not cases:
+        return jsonify({"error": "Provide a non-empty 'cases' list of symptom strings."}), 400
+
+    resolved = [selected.resolve(parse_symptoms(str(case))) for case in cases]
+
+    # One model call for every case; cases with no recognized symptom keep a zero row
+    proba = selected.predict_indices([r[0] for r in resolved])
+    results = []
+    for row, (indices, recognized, unrecognized) in enumerate(resolved):
+        if not recognized:
+            proba[row] = 0
+            results.append({
+                "error": f"No valid symptoms recognized. Unrecognized: {', '.join(unrecognized)}"
+            })
+            continue
+        result = selected.build_result(proba[row], recognized, unrecognized)
+        if data.get("distribution"):
+            result["probabilities"] = proba[row] * 100
+        results.append(result)
+
+    answered = [row for row, result in enumerate(results) if "error" not in result]
+    if answered:
+        mirror_to_shadow(selected, [resolved[row][0] for row in answered], [results[row] for row in answered])
+
+    mimetype = serialization.negotiate(request.accept_mimetypes)
+    g.prediction = ("model", {"results": results})
+    return respond({"results": results}, proba, mimetype)
+
+
+@app.route("/suggest-next", methods=["POST"])
+def suggest_next():
+    data = request.get_json(force=True)
+    indices, recognized, unrecognized = bundle.resolve(parse_symptoms(data.get("symptoms", "")))
+
+    if bundle.likelihood is None:
+        return jsonify({"error": "Co-occurrence data missing. Re-run src/preprocess.py."}), 503
+
+    try:
+        top = int(data.get("top", 10))
+    except (TypeError, ValueError):
+        top = 0
+    if top < 1:
+        return jsonify({"error": "'top' must be a positive integer."}), 400
+
+    top = min(top, bundle.n_features)
+    prior, order, gains = bundle.suggest_next(indices, top)
+
+    names = [bundle.clean_feature_columns[i] for i in order.tolist()]
+    return jsonify({
+        "recognized_symptoms":   recognized,
+        "unrecognized_symptoms": unrecognized,
+        "entropy_bits":          float(entropy(prior)),
+        "suggestions": [
+            {"symptom": name, "information_gain": gain}
+            for name, gain in zip(names, gains.tolist())
+        ],
+    })
+
+
+@app.route("/consistent-diseases", methods=["POST"])
+def consistent_diseases():
+    data = request.get_json(force=True)
+    indices, recognized, unrecognized = bundle.resolve(parse_symptoms(data.get("symptoms", "")))
+
+    if bundle.bitset_index is None:
+        return jsonify({"error": "Bitset index missing. Re-run src/preprocess.py."}), 503
 
-    top5_indices = np.argsort(prediction_proba)[::-1][:5]
-    top5 = [
-        {
-            "disease":     label_encoder.inverse_transform([int(i)])[0],
-            "probability": float(prediction_proba[i] * 100),
-        }
-        for i in top5_indices
-    ]
+    if not recognized:
+        return jsonify({
+            "error": f"No valid symptoms recognized. Unrecognized: {', '.join(unrecognized)}"
+        }), 400
 
+    names, counts = bundle.consistent_diseases(indices)
     return jsonify({
-        "predicted_disease":     predicted_disease,
-        "confidence":            confidence,
         "recognized_symptoms":   recognized,
         "unrecognized_symptoms": unrecognized,
-        "top5":                  top5,
+        "consistent_diseases": [
+            {"disease": name, "matching_rows": count}
+            for name, count in zip(names.tolist(), counts.tolist())
+        ],
+    })
+
+
+# --------------------------------------------------
+# Live Sessions
+# --------------------------------------------------
+
+# Server-side symptom vectors updated in place; each change is pushed to the session's stream.
+# They live in this process only: run the app as one process (threads are fine)
+sessions = SessionStore(bundle)
+
+
+def symptom_list(value):
+    """Normalized names from a comma-separated string or a list of names"""
+    if isinstance(value, list):
+        value = ",".join(str(item) for item in value)
+    return parse_symptoms(value or "")
+
+
+def unknown_session():
+    return jsonify({"error": "Unknown or expired session. Create a new one with POST /session."}), 404
+
+
+def session_response(snapshot, status=200):
+    """The session state, recorded for the audit log and mirrored to the shadow model like /predict"""
+    g.session_id = snapshot["session_id"]
+    prediction = snapshot["prediction"]
+    if prediction is not None:
+        g.prediction = ("session", prediction)
+        indices, _, _ = bundle.resolve(snapshot["symptoms"])
+        mirror_to_shadow(bundle, [indices], [prediction])
+    return jsonify(snapshot), status
+
+
+@app.route("/session", methods=["POST"])
+def create_session():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    session = sessions.create(symptom_list(data.get("symptoms")))
+    return session_response(session.current(), 201)
+
+
+@app.route("/session/<session_id>", methods=["GET", "DELETE"])
+def session_state(session_id):
+    try:
+        session = sessions.get(session_id)
+        if request.method == "DELETE":
+            sessions.close(session_id)
+            return jsonify({"session_id": session_id, "status": "closed"})
+    except KeyError:
+        return unknown_session()
+    return jsonify(session.current())
+
+
+@app.route("/session/<session_id>/symptoms", methods=["POST"])
+def update_session(session_id):
+    data = request.get_json(force=True)
+    try:
+        session = sessions.get(session_id)
+    except KeyError:
+        return unknown_session()
+    return session_response(session.update(add=symptom_list(data.get("add")), remove=symptom_list(data.get("remove"))))
+
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route("/session/<session_id>/stream", methods=["GET"])
+def stream_session(session_id):
+    try:
+        session = sessions.get(session_id)
+    except KeyError:
+        return unknown_session()
+
+    # Each open stream holds a server thread, so their number is capped
+    if not sessions.open_stream():
+        response = jsonify({"error": "Too many open streams. Use the responses of POST /session/<id>/symptoms."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+
+    def events():
+        snapshot = session.current()
+        yield sse_event("prediction", snapshot)
+        revision = snapshot["revision"]
+        while True:
+            snapshot = session.wait(revision)
+            if session.closed:
+                yield sse_event("closed", {"session_id": session_id})
+                return
+            if snapshot is None:
+                # An open stream keeps its session alive; the comment also detects gone clients
+                try:
+                    sessions.get(session_id)
+                except KeyError:
+                    yield sse_event("closed", {"session_id": session_id})
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            revision = snapshot["revision"]
+            yield sse_event("prediction", snapshot)
+
+    response = Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # The server closes the response when the stream ends or the client goes away, even if it never started
+    response.call_on_close(sessions.close_stream)
+    return response
+
+
+# --------------------------------------------------
+# Warm-Up & Readiness
+# --------------------------------------------------
+
+PROCESSED_DATA_PATH = "data/processed/processed_data.csv"
+
+# Warm-up traffic is tagged in the WSGI environ, which clients cannot set (their headers arrive as
+# HTTP_* keys), so it is not mistaken for the first real request and cannot skip admission or logging
+WARMUP_ENVIRON_KEY = "disease_app.warm_up"
+
+startup = {
+    "ready":            False,
+    "warmup_seconds":   None,
+    "warmup_requests":  0,
+    "warmup_error":     None,
+    "first_request_ms": None,
+}
+
+
+def warm_up():
+    """Sends representative predictions through the full request path, then marks the app ready"""
+    start = time.perf_counter()
+    try:
+        cases = representative_cases(bundle, PROCESSED_DATA_PATH)
+        client = app.test_client()
+        client.environ_base[WARMUP_ENVIRON_KEY] = True
+        responses = [client.post("/predict", json={"symptoms": case}) for case in cases]
+
+        # Exercise the batch path and every response encoder once
+        for mimetype in serialization.available_mimetypes():
+            responses.append(client.post(
+                "/predict/batch",
+                json={"cases": cases, "distribution": True},
+                headers={"Accept": mimetype},
+            ))
+
+        failed = [r.status_code for r in responses if r.status_code != 200]
+        if failed:
+            raise RuntimeError(f"{len(failed)} warm-up request(s) failed: {sorted(set(failed))}")
+
+        startup["warmup_requests"] = len(responses)
+        startup["ready"] = True
+    except Exception as exc:
+        startup["warmup_error"] = str(exc)
+
+    startup["warmup_seconds"] = round(time.perf_counter() - start, 3)
+    if startup["ready"]:
+        print(f"Warm-up complete: {startup['warmup_requests']} requests in {startup['warmup_seconds']}s")
+    else:
+        print(f"Warm-up failed after {startup['warmup_seconds']}s: {startup['warmup_error']}")
+
+
+def is_warm_up():
+    return request.environ.get(WARMUP_ENVIRON_KEY, False)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_first_request(response):
+    # Report the latency of the first real prediction after startup
+    if (
+        startup["first_request_ms"] is None
+        and request.path.startswith("/predict")
+        and not is_warm_up()
+    ):
+        startup["first_request_ms"] = round((time.perf_counter() - g.request_start) * 1000, 3)
+        print(f"First request latency: {startup['first_request_ms']} ms")
+    return response
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # Liveness only: the process is up and the model is loaded
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    status = "ready" if startup["ready"] else "warming_up"
+    if startup["warmup_error"]:
+        status = "failed"
+    return jsonify({"status": status, **startup}), 200 if startup["ready"] else 503
+
+
+# --------------------------------------------------
+# Admission Control
+# --------------------------------------------------
+
+# Only prediction work is limited; metadata and health endpoints always answer.
+# Session creation and updates re-predict, and /suggest-next runs a full forest prediction
+ADMISSION_ENDPOINTS = ("predict", "predict_batch", "create_session", "update_session", "suggest_next")
+
+# Client time budget in ms, counted from X-Request-Start when a load balancer sets it
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+# Proxies (comma-separated addresses) whose X-Client-Id header is trusted; from anyone else it is
+# ignored, since a client could otherwise pick a fresh id per request and never be rate limited
+TRUSTED_PROXIES = {addr.strip() for addr in os.environ.get("TRUSTED_PROXIES", "").split(",") if addr.strip()}
+
+admission = AdmissionController()
+
+
+def client_id():
+    """The rate-limit key: the remote address, or the id a trusted proxy forwards"""
+    if request.remote_addr in TRUSTED_PROXIES and request.headers.get("X-Client-Id"):
+        return request.headers["X-Client-Id"]
+    return request.remote_addr
+
+
+@app.before_request
+def admit_request():
+    if request.endpoint not in ADMISSION_ENDPOINTS or is_warm_up():
+        return None
+
+    client = client_id()
+    deadline = request_deadline(request.headers.get(TIMEOUT_HEADER), request.headers.get("X-Request-Start"))
+    rejection = admission.admit(client, deadline)
+    if rejection is not None:
+        response = jsonify({"error": "Server is overloaded. Retry later.", "reason": rejection.reason})
+        response.status_code = rejection.status
+        response.headers["Retry-After"] = str(rejection.retry_after)
+        return response
+    g.admitted = True
+    return None
+
+
+@app.teardown_request
+def release_admission(exc):
+    if g.pop("admitted", False):
+        admission.release()
+
+
+# --------------------------------------------------
+# Request Logging
+# --------------------------------------------------
+
+# Audit records are queued here and written by a background thread, never on the request path
+try:
+    request_logger = RequestLogger() if LOG_DIR else None
+except OSError as exc:
+    print(f"Request logging disabled: {exc}")
+    request_logger = None
+
+
+def summarize_prediction(result):
+    """The audit fields of one /predict result"""
+    if "error" in result:
+        return {"error": result["error"]}
+    return {
+        "predicted_disease": result["predicted_disease"],
+        "confidence":        round(result["confidence"], 4),
+        "top5":              [entry["disease"] for entry in result["top5"]],
+    }
+
+
+@app.after_request
+def log_request(response):
+    if request_logger is None or request.endpoint not in ADMISSION_ENDPOINTS or is_warm_up():
+        return response
+
+    # Bodies that are valid JSON but not an object are logged without request fields
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    record = {
+        "ts":             round(time.time(), 3),
+        "endpoint":       request.path,
+        "status":         response.status_code,
+        "latency_ms":     round((time.perf_counter() - g.request_start) * 1000, 3),
+        # The version that answered; "model_version" is only recorded when the client picked one
+        "served_version": g.get("model", (None, bundle.version))[1],
+        "client":         client_id(),
+    }
+
+    # Request fields are kept as sent, so a log line can be replayed as a request body
+    for field in ("model", "model_version"):
+        if data.get(field):
+            record[field] = data[field]
+    if request.path == "/predict":
+        record["symptoms"] = data.get("symptoms")
+        for flag in ("distribution", "explain"):
+            if data.get(flag):
+                record[flag] = True
+    elif request.path == "/predict/batch":
+        record["cases"] = data.get("cases")
+    elif request.path == "/suggest-next":
+        record["symptoms"] = data.get("symptoms")
+        record["top"] = data.get("top")
+    else:
+        # Session changes in order, so a session can be replayed from its records
+        record["session_id"] = g.get("session_id")
+        for field in ("symptoms", "add", "remove"):
+            if data.get(field):
+                record[field] = data[field]
+
+    prediction = g.get("prediction")
+    if prediction is not None:
+        source, result = prediction
+        record["source"] = source
+        if "results" in result:
+            record["results"] = [summarize_prediction(r) for r in result["results"]]
+        else:
+            record.update(summarize_prediction(result))
+    elif response.is_json:
+        record["error"] = (response.get_json(silent=True) or {}).get("error")
+
+    request_logger.log(record)
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify({
+        "admission":   admission.metrics(),
+        "request_log": request_logger.metrics() if request_logger is not None else None,
+        "shadow":      shadow.metrics() if shadow is not None else None,
+        "sessions":    sessions.metrics(),
     })
 
 
+# --------------------------------------------------
+# Model Registry
+# --------------------------------------------------
+
+@app.after_request
+def record_model_latency(response):
+    model = g.get("model")
+    if model is not None and response.status_code == 200 and not is_warm_up():
+        registry.record_latency(*model, (time.perf_counter() - g.request_start) * 1000)
+    return response
+
+
+@app.route("/models", methods=["GET"])
+def list_models():
+    # Published variants, what is resident, load/evict events and per-model latency
+    return jsonify({
+        "default":   {"name": DEFAULT_MODEL, "version": bundle.version},
+        "available": registry.available(),
+        **registry.metrics(),
+    })
+
+
+@app.route("/admin/models/reload", methods=["POST"])
+def reload_models():
+    # Makes a just-published version answer at once instead of after MODEL_REGISTRY_RESOLVE_TTL_S
+    denied = admin_denied()
+    if denied:
+        return denied
+    registry.reload()
+    return jsonify({"available": registry.available()})
+
+
+# --------------------------------------------------
+# Profiling
+# --------------------------------------------------
+
+# Admin endpoints need this token in X-Admin-Token; without one they are disabled
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+profiler = RequestProfiler()
+
+
+@app.before_request
+def start_profile():
+    # Runs after admission, so shed requests are never profiled
+    if request.endpoint in ADMISSION_ENDPOINTS and not is_warm_up():
+        profiler.start(request.path)
+        g.profiled = True
+
+
+@app.after_request
+def record_status(response):
+    g.status = response.status_code
+    return response
+
+
+@app.teardown_request
+def finish_profile(exc):
+    if g.pop("profiled", False):
+        profiler.finish((time.perf_counter() - g.request_start) * 1000, g.get("status", 500))
+
+
+def admin_denied():
+    """A 404 response while no token is configured, a 403 one unless the caller sends it"""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled. Set ADMIN_TOKEN to enable them."}), 404
+    # Constant-time comparison, so response timing does not reveal how much of a guess matched
+    sent = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(sent.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Admin access denied."}), 403
+    return None
+
+
+@app.route("/admin/profiling", methods=["GET", "POST"])
+def profiling_settings():
+    denied = admin_denied()
+    if denied:
+        return denied
+
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        try:
+            profiler.configure(data.get("enabled"), data.get("slow_ms"), data.get("sample_rate"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "'slow_ms' and 'sample_rate' must be numbers."}), 400
+        if data.get("reset"):
+            profiler.reset()
+    return jsonify(profiler.describe())
+
+
+@app.route("/admin/profiling/stacks", methods=["GET"])
+def profiling_stacks():
+    denied = admin_denied()
+    if denied:
+        return denied
+    return Response(profiler.collapsed(), mimetype="text/plain",
+                    headers={"Content-Disposition": "attachment; filename=slow_requests.folded"})
+
+
+@app.route("/admin/profiling/pstats", methods=["GET"])
+def profiling_pstats():
+    denied = admin_denied()
+    if denied:
+        return denied
+    data = profiler.pstats_bytes()
+    if data is None:
+        return jsonify({"error": "No requests profiled yet. Set a sample_rate above 0."}), 404
+    return Response(data, mimetype="application/octet-stream",
+                    headers={"Content-Disposition": "attachment; filename=requests.pstats"})
+
+
+# Warm up in the background so /healthz answers while the model is being exercised
+threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
 # --------------------------------------------------
 # Entry Point
 # --------------------------------------------------
@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+# Reuse the project's backends from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from backends import BACKENDS, linear_scorer, make_model
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+PROCESSED_DATA_PATH = "data/processed/processed_data.csv"
+
+# Mirrors train_model.py's MODEL_PARAMS; single-threaded so latency reflects one request
+FOREST_PARAMS = dict(
+    n_estimators=200,
+    max_depth=None,
+    min_samples_split=2,
+    min_samples_leaf=1,
+    random_state=42,
+    n_jobs=1,
+    class_weight="balanced",
+)
+
+TOP_K = 5
+
+# --------------------------------------------------
+# Partial Symptom Sets
+# --------------------------------------------------
+
+def partial_cases(X_test, n_cases, seed=42):
+    """Index lists of 2-4 symptoms drawn from held-out cases, like a user mid-selection"""
+    rng = np.random.default_rng(seed)
+    cases = []
+    for row in rng.choice(len(X_test), size=n_cases):
+        active = np.flatnonzero(X_test[row])
+        k = min(len(active), rng.integers(2, 5))
+        cases.append(sorted(rng.choice(active, size=k, replace=False).tolist()))
+    return cases
+
+
+def one_hot(index_lists, n_features):
+    X = np.zeros((len(index_lists), n_features), dtype=np.float32)
+    for row, indices in enumerate(index_lists):
+        X[row, indices] = 1
+    return X
+
+
+def top_k_sets(proba, k=TOP_K):
+    return [set(row) for row in np.argsort(-proba, axis=1, kind="stable")[:, :k]]
+
+# --------------------------------------------------
+# Measurement
+# --------------------------------------------------
+
+def serving_predict(model):
+    """The path ModelBundle.predict_indices takes for this backend"""
+    scorer = linear_scorer(model)
+    if scorer is not None:
+        return scorer.predict_proba_indices, scorer
+    n_features = model.n_features_in_
+    return (lambda index_lists: model.predict_proba(one_hot(index_lists, n_features))), model
+
+
+def single_row_latency_us(predict, cases):
+    timings = []
+    for indices in cases:
+        start = time.perf_counter()
+        predict([indices])
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e6)
+
+
+def measure(backend, X_train, y_train, X_test, y_test, cases):
+    model = make_model(backend, FOREST_PARAMS)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    predict, served = serving_predict(model)
+    accuracy = float((model.predict(X_test) == y_test).mean())
+
+    return {
+        "fit_s":      fit_s,
+        "accuracy":   accuracy,
+        "proba":      predict(cases),
+        "latency_us": single_row_latency_us(predict, cases),
+        "model_kb":   len(pickle.dumps(model)) / 1024,
+        "served_kb":  len(pickle.dumps(served)) / 1024,
+    }
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy, top-5 agreement, latency and size per backend.")
+    parser.add_argument("--data", default=PROCESSED_DATA_PATH)
+    parser.add_argument("--cases", type=int, default=1000, help="partial symptom sets for agreement and latency")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    X = df.drop(columns="Disease").to_numpy(dtype=np.float32)
+    y = df["Disease"].to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    cases = partial_cases(X_test, args.cases)
+
+    print(f"{len(y_train)} train / {len(y_test)} test rows, {len(cases)} partial cases (2-4 symptoms)\n")
+    results = {backend: measure(backend, X_train, y_train, X_test, y_test, cases) for backend in BACKENDS}
+
+    # Agreement is measured against the forest, the reference model
+    reference = top_k_sets(results["forest"]["proba"])
+
+    header = (
+        f"{'backend':<12} {'accuracy':>9} {'top-1 agree':>12} {'top-5 overlap':>14} "
+        f"{'latency us':>11} {'pickle KB':>10} {'served KB':>10} {'fit s':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for backend, r in results.items():
+        top1 = float((r["proba"].argmax(axis=1) == results["forest"]["proba"].argmax(axis=1)).mean())
+        overlap = np.mean([len(a & b) / TOP_K for a, b in zip(top_k_sets(r["proba"]), reference)])
+        print(
+            f"{backend:<12} {r['accuracy'] * 100:>8.2f}% {top1 * 100:>11.1f}% {overlap * 100:>13.1f}% "
+            f"{r['latency_us']:>11.1f} {r['model_kb']:>10.0f} {r['served_kb']:>10.0f} {r['fit_s']:>7.2f}"
+        )
@@ -0,0 +1,130 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+GENERATOR = os.path.join(ROOT, "benchmarks", "synthetic_dataset.py")
+PREPROCESS = os.path.join(ROOT, "src", "preprocess.py")
+TRAIN = os.path.join(ROOT, "src", "train_model.py")
+RAW_DATA_PATH = os.path.join(ROOT, "data", "raw", "dataset.csv")
+
+# rows:symptoms:diseases; the first is the original dataset's size
+DEFAULT_SCALES = ["4920:131:41", "100000:500:100", "1000000:2000:300"]
+
+# The generator's summary line, with the diseases and symptoms it could actually produce
+GENERATED_PATTERN = re.compile(r"\((\d+) diseases, (\d+) symptoms\)")
+
+# preprocess.py / train_model.py flags per preprocessing mode
+MODE_FLAGS = {
+    "dense":  ([], []),
+    "sparse": (["--sparse"], ["--sparse"]),
+    "stream": (["--stream"], ["--matrix"]),
+}
+
+# --------------------------------------------------
+# Stage Measurement
+# --------------------------------------------------
+
+def run_stage(command, cwd):
+    """Runs one stage in a fresh process; returns (seconds, peak RSS in MB, exit code, stdout)"""
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(command, cwd=cwd, stdout=stdout, stderr=stderr)
+
+        # wait4 reports the child's own peak RSS, unaffected by this process or earlier stages
+        _, status, usage = os.wait4(proc.pid, 0)
+        seconds = time.perf_counter() - start
+        proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        if proc.returncode != 0:
+            stderr.seek(0)
+            print(stderr.read().decode(errors="replace")[-2000:], file=sys.stderr)
+        stdout.seek(0)
+        output = stdout.read().decode(errors="replace")
+
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    peak_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return seconds, peak_mb, proc.returncode, output
+
+
+def run_scale(rows, symptoms, diseases, mode, seed, keep_dir=None):
+    """Generate -> preprocess -> train in a scratch directory, so the real data/ and models/ are untouched"""
+    scratch = keep_dir or tempfile.mkdtemp(prefix="pipeline_scaling_")
+    raw_path = os.path.join(scratch, "data", "raw", "dataset.csv")
+    preprocess_flags, train_flags = MODE_FLAGS[mode]
+
+    stages = [
+        ("generate", [sys.executable, GENERATOR, raw_path, "--rows", str(rows), "--symptoms", str(symptoms),
+                      "--diseases", str(diseases), "--raw", RAW_DATA_PATH, "--seed", str(seed)]),
+        ("preprocess", [sys.executable, PREPROCESS, "--force", *preprocess_flags]),
+        ("train", [sys.executable, TRAIN, "--force", *train_flags]),
+    ]
+
+    results = []
+    try:
+        for stage, command in stages:
+            seconds, peak_mb, code, output = run_stage(command, scratch)
+            results.append({"stage": stage, "seconds": seconds, "peak_mb": peak_mb, "exit_code": code})
+
+            # The requested vocabulary is an upper bound; record what the dataset really has
+            generated = GENERATED_PATTERN.search(output) if stage == "generate" else None
+            if generated:
+                results[-1]["diseases"], results[-1]["symptoms"] = (int(n) for n in generated.groups())
+            if code != 0:
+                break
+        if os.path.exists(raw_path):
+            results.append({"stage": "raw csv", "size_mb": os.path.getsize(raw_path) / 1e6})
+    finally:
+        if keep_dir is None:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and peak memory of each pipeline stage on synthetic data.")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES, help="rows:symptoms:diseases per run")
+    parser.add_argument("--mode", choices=MODE_FLAGS, default="sparse", help="preprocessing / training input format")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", metavar="DIR", help="keep the last scale's scratch directory here")
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    header = f"{'rows':>10} {'symptoms':>8} {'diseases':>8} {'stage':<10} {'seconds':>9} {'peak MB':>9} {'status':>6}"
+    print(f"mode: {args.mode}\n")
+    print(header)
+    print("-" * len(header))
+
+    report = []
+    for i, scale in enumerate(args.scales):
+        rows, symptoms, diseases = (int(part) for part in scale.split(":"))
+        keep_dir = args.keep if args.keep and i == len(args.scales) - 1 else None
+        results = run_scale(rows, symptoms, diseases, args.mode, args.seed, keep_dir)
+        report.append({"rows": rows, "symptoms": symptoms, "diseases": diseases, "stages": results})
+
+        for result in results:
+            if "seconds" in result:
+                status = "ok" if result["exit_code"] == 0 else f"exit {result['exit_code']}"
+                print(f"{rows:>10} {symptoms:>8} {diseases:>8} {result['stage']:<10} "
+                      f"{result['seconds']:>9.1f} {result['peak_mb']:>9.0f} {status:>6}")
+                if result.get("symptoms", symptoms) != symptoms:
+                    print(f"{'':>10} {result['symptoms']:>8} {result['diseases']:>8} "
+                          f"{'effective':<10} (vocabulary the generator could fill)")
+            else:
+                print(f"{'':>10} {'':>8} {'':>8} {result['stage']:<10} {result['size_mb']:>8.1f}M")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"mode": args.mode, "scales": report}, f, indent=2)
+        print(f"\nResults written to {args.output}")
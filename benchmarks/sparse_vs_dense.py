@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+
+# Reuse the project's encoders from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from preprocess import encode_sparse
+
+# --------------------------------------------------
+# Synthetic Cases
+# --------------------------------------------------
+
+# Every case has at most 17 symptoms, like the raw dataset's Symptom_1..Symptom_17
+MAX_SYMPTOMS = 17
+
+
+def synthetic_cases(n_rows, n_symptoms, n_diseases, seed=42):
+    """Raw-style symptom name grid + labels; each disease draws from its own symptom pool"""
+    rng = np.random.default_rng(seed)
+    pools = [rng.choice(n_symptoms, size=min(n_symptoms, 30), replace=False) for _ in range(n_diseases)]
+    labels = rng.integers(n_diseases, size=n_rows)
+
+    values = np.full((n_rows, MAX_SYMPTOMS), "None", dtype=object)
+    for row, label in enumerate(labels):
+        k = rng.integers(3, MAX_SYMPTOMS + 1)
+        values[row, :k] = [f"symptom_{i}" for i in rng.choice(pools[label], size=k, replace=False)]
+
+    vocabulary = pd.Index([f"symptom_{i}" for i in range(n_symptoms)])
+    return values, labels, vocabulary
+
+
+def encode_dense(values, vocabulary):
+    """The dense path: allocate (rows x vocabulary) and scatter ones"""
+    codes = vocabulary.get_indexer(values.ravel()).reshape(values.shape)
+    X = np.zeros((len(values), len(vocabulary)), dtype=np.uint8)
+    rows = np.broadcast_to(np.arange(len(values))[:, None], codes.shape)
+    known = codes >= 0
+    X[rows[known], codes[known]] = 1
+    return X
+
+# --------------------------------------------------
+# Measurement
+# --------------------------------------------------
+
+def matrix_bytes(X):
+    if sparse.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def measure(encode, values, labels, vocabulary, n_estimators, n_predict):
+    """Times encode / fit / batch predict and records the peak traced memory of the run"""
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    X = encode(values, vocabulary)
+    encode_s = time.perf_counter() - start
+
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=1)
+    start = time.perf_counter()
+    model.fit(X, labels)
+    fit_s = time.perf_counter() - start
+
+    batch = X[:n_predict]
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    predict_ms = (time.perf_counter() - start) * 1000
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "matrix_mb":  matrix_bytes(X) / 1e6,
+        "peak_mb":    peak / 1e6,
+        "encode_s":   encode_s,
+        "fit_s":      fit_s,
+        "predict_ms": predict_ms,
+    }
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dense vs CSR memory and time as the vocabulary grows.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--vocab", type=int, nargs="+", default=[131, 1000, 5000])
+    parser.add_argument("--diseases", type=int, default=41)
+    parser.add_argument("--trees", type=int, default=20)
+    parser.add_argument("--predict-rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{args.rows} rows, {args.diseases} diseases, {args.trees} trees, batch of {args.predict_rows}\n")
+    header = f"{'vocab':>7} {'path':<7} {'matrix MB':>10} {'peak MB':>9} {'encode s':>9} {'fit s':>7} {'predict ms':>11}"
+    print(header)
+    print("-" * len(header))
+
+    for n_symptoms in args.vocab:
+        values, labels, vocabulary = synthetic_cases(args.rows, n_symptoms, args.diseases)
+        for name, encode in (("dense", encode_dense), ("sparse", encode_sparse)):
+            r = measure(encode, values, labels, vocabulary, args.trees, args.predict_rows)
+            print(
+                f"{n_symptoms:>7} {name:<7} {r['matrix_mb']:>10.2f} {r['peak_mb']:>9.1f} "
+                f"{r['encode_s']:>9.3f} {r['fit_s']:>7.2f} {r['predict_ms']:>11.1f}"
+            )
@@ -0,0 +1,156 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+RAW_DATA_PATH = "data/raw/dataset.csv"
+
+# Raw-format columns: Disease, Symptom_1 .. Symptom_17
+MAX_SYMPTOMS = 17
+
+# Rows generated and written per block (also fixes the random stream, so output is deterministic)
+BLOCK_ROWS = 100_000
+
+# Share of a synthetic disease's symptoms swapped for random ones from the enlarged vocabulary
+REMAP_FRACTION = 0.5
+
+# Frequency of the leftover synthetic symptoms placed in free slots of any disease
+RARE_SYMPTOM_FREQUENCY = 0.05
+
+# --------------------------------------------------
+# Per-Disease Profiles
+# --------------------------------------------------
+
+def disease_profiles(raw_path=RAW_DATA_PATH):
+    """P(symptom | disease) from the original dataset, as (diseases, vocabulary, idx, proba)"""
+    df = pd.read_csv(raw_path, dtype=str)
+    long = df.melt(id_vars="Disease", value_name="Symptom").dropna()
+    long["Disease"] = long["Disease"].str.strip()
+    long["Symptom"] = long["Symptom"].str.strip()
+
+    diseases = sorted(long["Disease"].unique())
+    vocabulary = sorted(long["Symptom"].unique())
+    rows_per_disease = df["Disease"].str.strip().value_counts()
+
+    # Padded (diseases x MAX_SYMPTOMS) symptom ids and frequencies; padding has probability 0
+    idx = np.zeros((len(diseases), MAX_SYMPTOMS), dtype=np.int64)
+    proba = np.zeros((len(diseases), MAX_SYMPTOMS))
+    symptom_id = {name: i for i, name in enumerate(vocabulary)}
+    for d, (disease, group) in enumerate(long.groupby("Disease", sort=True)):
+        counts = group["Symptom"].value_counts(sort=False)
+        ids = [symptom_id[name] for name in counts.index][:MAX_SYMPTOMS]
+        idx[d, :len(ids)] = ids
+        proba[d, :len(ids)] = counts.to_numpy()[:len(ids)] / rows_per_disease[disease]
+    return diseases, vocabulary, idx, proba
+
+
+def scale_profiles(diseases, vocabulary, idx, proba, n_diseases, n_symptoms, seed=42):
+    """Adds synthetic symptoms and diseases; each new disease is a remapped copy of an original one.
+
+    Symptoms the remapping leaves unused become rare symptoms of random diseases (original ones included),
+    as long as free slots last.
+    """
+    rng = np.random.default_rng(seed)
+    n_original = len(vocabulary)
+    n_symptoms = max(n_symptoms, n_original)
+    vocabulary = vocabulary + [f"synthetic_symptom_{i:05d}" for i in range(n_symptoms - n_original)]
+
+    # New symptoms are handed out before any is reused, so the whole vocabulary occurs
+    unused = list(rng.permutation(np.arange(n_original, n_symptoms)))
+
+    names = list(diseases[:n_diseases])
+    new_idx, new_proba = [idx[:n_diseases]], [proba[:n_diseases]]
+    for d in range(len(names), n_diseases):
+        template = d % len(diseases)
+        row = idx[template].copy()
+
+        # Swap part of the template's symptoms for others, keeping its frequency shape
+        active = np.flatnonzero(proba[template] > 0)
+        swap = active[rng.random(len(active)) < REMAP_FRACTION]
+        for position in swap:
+            if unused:
+                row[position] = unused.pop()
+            else:
+                row[position] = rng.choice(np.setdiff1d(np.arange(n_symptoms), row[active]))
+
+        names.append(f"Synthetic disease {d:04d} ({diseases[template]})")
+        new_idx.append(row[None, :])
+        new_proba.append(proba[template][None, :])
+
+    idx, proba = np.concatenate(new_idx), np.concatenate(new_proba)
+
+    # Too few new diseases to carry the vocabulary: spread the rest over every disease's free slots
+    free = np.argwhere(proba == 0)
+    for (d, position), symptom in zip(free[rng.permutation(len(free))], unused):
+        idx[d, position] = symptom
+        proba[d, position] = RARE_SYMPTOM_FREQUENCY
+
+    return names, vocabulary, idx, proba
+
+# --------------------------------------------------
+# Row Generation
+# --------------------------------------------------
+
+def generate_block(rng, n_rows, idx, proba, vocabulary):
+    """Raw-format rows: each symptom of the row's disease is present with its per-disease frequency"""
+    labels = rng.integers(len(idx), size=n_rows)
+    present = rng.random((n_rows, MAX_SYMPTOMS)) < proba[labels]
+
+    # Every case has at least one symptom (the original has at least three)
+    empty = ~present.any(axis=1)
+    present[empty, np.argmax(proba[labels[empty]], axis=1)] = True
+
+    # Move present symptoms to the front, keeping the disease's column order
+    order = np.argsort(~present, axis=1, kind="stable")
+    ids = np.take_along_axis(idx[labels], order, axis=1)
+    keep = np.take_along_axis(present, order, axis=1)
+
+    names = np.asarray(vocabulary, dtype=object)[ids]
+    names[~keep] = None
+    return labels, names
+
+
+def generate(out_path, n_rows, n_symptoms, n_diseases, raw_path=RAW_DATA_PATH, seed=42):
+    """Writes a deterministic raw-format CSV of n_rows cases, block by block"""
+    diseases, vocabulary, idx, proba = disease_profiles(raw_path)
+    names, vocabulary, idx, proba = scale_profiles(diseases, vocabulary, idx, proba, n_diseases, n_symptoms, seed)
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    columns = [f"Symptom_{i + 1}" for i in range(MAX_SYMPTOMS)]
+    disease_names = np.asarray(names, dtype=object)
+
+    # One child random stream per block, so any block can be regenerated on its own
+    streams = np.random.SeedSequence(seed).spawn(-(-n_rows // BLOCK_ROWS))
+    for block, stream in enumerate(streams):
+        rows = min(BLOCK_ROWS, n_rows - block * BLOCK_ROWS)
+        labels, symptoms = generate_block(np.random.default_rng(stream), rows, idx, proba, vocabulary)
+        frame = pd.DataFrame(symptoms, columns=columns)
+        frame.insert(0, "Disease", disease_names[labels])
+        frame.to_csv(out_path, mode="w" if block == 0 else "a", header=block == 0, index=False)
+
+    # Symptoms that can occur; fewer than requested if there are too few diseases to carry them all
+    return len(names), len(np.unique(idx[proba > 0]))
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a raw-format dataset of any size from the original's profiles.")
+    parser.add_argument("out", help="output CSV path")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--symptoms", type=int, default=131, help="vocabulary size (at least the original's)")
+    parser.add_argument("--diseases", type=int, default=41)
+    parser.add_argument("--raw", default=RAW_DATA_PATH, help="original dataset to take the profiles from")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_diseases, n_symptoms = generate(args.out, args.rows, args.symptoms, args.diseases, args.raw, args.seed)
+    print(f"Wrote {args.rows} rows ({n_diseases} diseases, {n_symptoms} symptoms) to {args.out} "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import argparse
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Reuse the project's serving code from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inference import ModelBundle
+
+# --------------------------------------------------
+# Workload
+# --------------------------------------------------
+
+def random_cases(n_features, n_cases, seed=42):
+    """Symptom index lists of 3-6 symptoms, the size of a typical /predict request"""
+    rng = np.random.default_rng(seed)
+    return [rng.choice(n_features, size=rng.integers(3, 7), replace=False).tolist() for _ in range(n_cases)]
+
+
+def pickled_predict(bundle):
+    """The pre-policy path: the forest as pickled (n_jobs=-1) through sklearn's predict_proba"""
+    model = bundle.model
+    return lambda index_lists: model.predict_proba(bundle.vectorize_batch(index_lists))
+
+
+def run_load(predict, cases, batch_size, concurrency):
+    """`concurrency` threads issue requests back to back, like a threaded web server"""
+    batches = [cases[i:i + batch_size] for i in range(0, len(cases), batch_size)]
+    latencies = [None] * len(batches)
+    barrier = threading.Barrier(concurrency)
+
+    def worker(offset):
+        barrier.wait()
+        for i in range(offset, len(batches), concurrency):
+            start = time.perf_counter()
+            predict(batches[i])
+            latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall_s = time.perf_counter() - start
+
+    latencies = np.asarray(latencies) * 1000
+    return len(batches) / wall_s, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput and tail latency of the serving thread policy.")
+    parser.add_argument("--requests", type=int, default=400, help="single-row requests per run")
+    parser.add_argument("--batch-size", type=int, default=512, help="rows per request in the batch runs")
+    parser.add_argument("--batches", type=int, default=20, help="batch requests per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    # One copy gets the pickled n_jobs=-1 back to measure the pre-policy path
+    pickled_bundle = ModelBundle()
+    pickled_bundle.model.n_jobs = -1
+    policy_bundle = ModelBundle()
+    policy_bundle.thread_policy.limit_native_threads()
+    print(f"{os.cpu_count()} core(s); policy {policy_bundle.thread_policy.describe()}\n")
+
+    paths = (("pickled", pickled_predict(pickled_bundle)), ("policy", policy_bundle.predict_indices))
+    workloads = (
+        ("single", random_cases(policy_bundle.n_features, args.requests), 1),
+        ("batch", random_cases(policy_bundle.n_features, args.batches * args.batch_size), args.batch_size),
+    )
+
+    header = f"{'workload':<8} {'threads':>7} {'path':<8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for workload, cases, batch_size in workloads:
+        for concurrency in args.concurrency:
+            for name, predict in paths:
+                throughput, p50, p99 = run_load(predict, cases, batch_size, concurrency)
+                print(f"{workload:<8} {concurrency:>7} {name:<8} {throughput:>9.1f} {p50:>9.2f} {p99:>9.2f}")
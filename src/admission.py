@@ -0,0 +1,174 @@
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+
+# --------------------------------------------------
+# Settings (overridable through the environment)
+# --------------------------------------------------
+
+# Predictions running at once, and requests allowed to wait for a slot
+MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", 8))
+MAX_QUEUED = int(os.environ.get("ADMISSION_MAX_QUEUED", 32))
+
+# Longest a queued request waits for a slot before it is shed
+QUEUE_TIMEOUT_S = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_MS", 500)) / 1000
+
+# Per-client token bucket: sustained requests per second and burst size (rate 0 disables it)
+CLIENT_RATE = float(os.environ.get("ADMISSION_CLIENT_RATE", 50))
+CLIENT_BURST = float(os.environ.get("ADMISSION_CLIENT_BURST", 100))
+
+# Clients whose buckets are remembered (least recently seen are forgotten first)
+MAX_CLIENTS = 10_000
+
+# Retry-After (seconds) sent with 503 responses
+OVERLOAD_RETRY_AFTER_S = 1
+
+# Time budget applied when a request sends none (0 = no deadline)
+DEFAULT_TIMEOUT_MS = float(os.environ.get("ADMISSION_DEFAULT_TIMEOUT_MS", 0))
+
+# --------------------------------------------------
+# Request Deadlines
+# --------------------------------------------------
+
+def request_deadline(timeout_ms=None, request_start=None):
+    """Monotonic deadline from a client's time budget, minus time already spent upstream if known"""
+    try:
+        budget_s = float(timeout_ms) / 1000 if timeout_ms else DEFAULT_TIMEOUT_MS / 1000
+    except ValueError:
+        return None
+    if budget_s <= 0:
+        return None
+
+    # Load balancers stamp X-Request-Start as "t=<epoch>" in s, ms or us
+    elapsed = 0.0
+    if request_start:
+        value = request_start.strip()
+        try:
+            started = float(value[2:] if value.startswith("t=") else value)
+        except ValueError:
+            started = None
+        if started:
+            started /= 1e6 if started > 1e14 else 1e3 if started > 1e11 else 1
+            elapsed = max(0.0, time.time() - started)
+    return time.monotonic() + budget_s - elapsed
+
+# --------------------------------------------------
+# Per-Client Rate Limit
+# --------------------------------------------------
+
+class TokenBuckets:
+    """One token bucket per client id, refilled lazily on each request"""
+
+    def __init__(self, rate, burst, max_clients=MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()   # client -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def take(self, client, now):
+        """Takes one token; returns 0 on success, else seconds until a token is available"""
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait
+
+# --------------------------------------------------
+# Admission Controller
+# --------------------------------------------------
+
+class Rejection:
+    """Why a request was shed, and the response to send"""
+
+    def __init__(self, status, reason, retry_after):
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded in-flight work with a bounded wait queue, per-client rate limits and deadlines"""
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_queued=MAX_QUEUED, queue_timeout_s=QUEUE_TIMEOUT_S,
+                 client_rate=CLIENT_RATE, client_burst=CLIENT_BURST):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout_s = queue_timeout_s
+        self.buckets = TokenBuckets(client_rate, client_burst) if client_rate > 0 else None
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = {"rate_limited": 0, "queue_full": 0, "queue_timeout": 0, "deadline_expired": 0}
+
+    def _reject(self, status, reason, retry_after):
+        with self._lock:
+            self.shed[reason] += 1
+        return Rejection(status, reason, retry_after)
+
+    def admit(self, client, deadline=None):
+        """Returns None once the request holds a slot (call release() after), else a Rejection"""
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            return self._reject(503, "deadline_expired", OVERLOAD_RETRY_AFTER_S)
+
+        if self.buckets is not None:
+            wait = self.buckets.take(client, now)
+            if wait > 0:
+                return self._reject(429, "rate_limited", math.ceil(wait))
+
+        # Fast path: a free slot, no waiting
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.queued >= self.max_queued:
+                    self.shed["queue_full"] += 1
+                    return Rejection(503, "queue_full", OVERLOAD_RETRY_AFTER_S)
+                self.queued += 1
+
+            # Never wait past the request's own deadline
+            timeout = self.queue_timeout_s
+            if deadline is not None:
+                timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+            acquired = self._slots.acquire(timeout=timeout)
+            with self._lock:
+                self.queued -= 1
+            if not acquired:
+                return self._reject(503, "queue_timeout", OVERLOAD_RETRY_AFTER_S)
+
+            # The deadline may have passed while queued; drop it before any inference
+            if deadline is not None and time.monotonic() >= deadline:
+                self._slots.release()
+                return self._reject(503, "deadline_expired", OVERLOAD_RETRY_AFTER_S)
+
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+        return None
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "in_flight":     self.in_flight,
+                "queue_depth":   self.queued,
+                "max_in_flight": self.max_in_flight,
+                "max_queued":    self.max_queued,
+                "admitted":      self.admitted,
+                "shed":          dict(self.shed),
+            }
@@ -0,0 +1,88 @@
+import numpy as np
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import BernoulliNB
+
+# --------------------------------------------------
+# Model Backends
+# --------------------------------------------------
+
+BACKENDS = ("forest", "naive_bayes", "logistic")
+
+
+def make_model(backend, forest_params):
+    """Creates an untrained estimator for the chosen backend"""
+    if backend == "naive_bayes":
+        return BernoulliNB(alpha=1.0)
+    if backend == "logistic":
+        # Multinomial softmax over the binary symptom indicators
+        return LogisticRegression(C=10.0, max_iter=2000)
+    return RandomForestClassifier(**forest_params)
+
+
+def backend_name(model):
+    """Backend label recorded in model_info.json"""
+    if isinstance(model, BernoulliNB):
+        return "naive_bayes"
+    if isinstance(model, LogisticRegression):
+        return "logistic"
+    return "forest"
+
+# --------------------------------------------------
+# Linear Scoring Over Active Symptoms
+# --------------------------------------------------
+
+class LinearScorer:
+    """Scores classes as bias + sum of weight rows of the active symptoms, then softmax"""
+
+    def __init__(self, bias, weights):
+        self.bias = np.ascontiguousarray(bias, dtype=np.float64)          # (n_classes,)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)    # (n_features, n_classes)
+
+    def predict_proba_indices(self, index_lists):
+        """Class probabilities for each list of active feature indices"""
+        if len(index_lists) == 1:
+            # Single request: gather the few active rows instead of building a matrix
+            scores = (self.bias + self.weights[sorted(set(index_lists[0]))].sum(axis=0))[None, :]
+        else:
+            scores = self.predict_scores(self._csr(index_lists))
+        return self._softmax(scores)
+
+    def predict_proba(self, X):
+        """Class probabilities for a dense or CSR one-hot matrix"""
+        return self._softmax(self.predict_scores(X))
+
+    def predict_scores(self, X):
+        return np.asarray(X @ self.weights) + self.bias
+
+    def _csr(self, index_lists):
+        rows = [sorted(set(indices)) for indices in index_lists]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=indptr[1:])
+        indices = np.fromiter((i for r in rows for i in r), dtype=np.int32, count=int(indptr[-1]))
+        data = np.ones(len(indices))
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), self.weights.shape[0]))
+
+    @staticmethod
+    def _softmax(scores):
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+
+def linear_scorer(model):
+    """Folds a fitted Naive Bayes / logistic model into a LinearScorer (None for forests)"""
+    if isinstance(model, BernoulliNB):
+        # log P(c) + sum_j [x_j log p_cj + (1 - x_j) log(1 - p_cj)]
+        #   = [log P(c) + sum_j log(1 - p_cj)] + sum_{j active} [log p_cj - log(1 - p_cj)]
+        log_p = model.feature_log_prob_
+        log_not_p = np.log1p(-np.exp(log_p))
+        return LinearScorer(
+            model.class_log_prior_ + log_not_p.sum(axis=1),
+            (log_p - log_not_p).T,
+        )
+    if isinstance(model, LogisticRegression) and model.coef_.shape[0] > 1:
+        return LinearScorer(model.intercept_, model.coef_.T)
+    return None
@@ -0,0 +1,124 @@
+import os
+import numpy as np
+
+# File written by preprocess.py next to the other model artifacts
+BITSET_FILENAME = "symptom_bitsets.npz"
+
+# --------------------------------------------------
+# Bit Packing
+# --------------------------------------------------
+
+def pack_rows(X):
+    """Packs a binary (rows x features) matrix into uint64 words, 64 features per word"""
+    X = np.asarray(X, dtype=bool)
+    n_words = max(1, -(-X.shape[1] // 64))
+
+    # Pad to a whole number of words, then reinterpret each 8 packed bytes as one word
+    padded = np.zeros((X.shape[0], n_words * 64), dtype=bool)
+    padded[:, :X.shape[1]] = X
+    packed = np.packbits(padded, axis=1, bitorder="little")
+    return packed.view("<u8")
+
+
+def pack_indices(indices, n_features):
+    """Packs a single set of feature indices into a (n_words,) uint64 query"""
+    row = np.zeros((1, n_features), dtype=bool)
+    row[0, list(indices)] = True
+    return pack_rows(row)[0]
+
+# --------------------------------------------------
+# Build Index
+# --------------------------------------------------
+
+def build_index(X, labels):
+    """Packs training rows grouped by disease, collapsing duplicate rows into counts"""
+    words = pack_rows(X)
+    labels = np.asarray(labels, dtype=np.int64)
+
+    # Unique (label, row) pairs with their multiplicity — the raw data repeats rows heavily
+    keyed = np.concatenate([labels[:, None].astype("<u8"), words], axis=1)
+    unique, counts = np.unique(keyed, axis=0, return_counts=True)
+
+    # np.unique sorts by the first column, so rows are already grouped by disease
+    return {
+        "words":  np.ascontiguousarray(unique[:, 1:]),
+        "labels": unique[:, 0].astype(np.int64),
+        "counts": counts.astype(np.int64),
+    }
+
+
+def merge_index(*indexes):
+    """Combines built indexes (e.g. from consecutive chunks) in one pass, summing duplicate counts"""
+    indexes = [index for index in indexes if index is not None]
+    if len(indexes) == 1:
+        return indexes[0]
+    keyed = np.concatenate([
+        np.concatenate([index["labels"][:, None].astype("<u8"), index["words"]], axis=1)
+        for index in indexes
+    ])
+    counts = np.concatenate([index["counts"] for index in indexes])
+    unique, inverse = np.unique(keyed, axis=0, return_inverse=True)
+    return {
+        "words":  np.ascontiguousarray(unique[:, 1:]),
+        "labels": unique[:, 0].astype(np.int64),
+        "counts": np.bincount(inverse.ravel(), weights=counts, minlength=len(unique)).astype(np.int64),
+    }
+
+
+
+class IndexBuilder:
+    """Builds the index chunk by chunk without re-sorting the whole index for every chunk.
+
+    Chunk indexes wait in a pending list and are merged once they hold more rows than the merged
+    index, so the total work stays close to linear and memory stays within about twice the unique
+    (disease, symptom set) rows plus one chunk.
+    """
+
+    def __init__(self):
+        self.merged = None
+        self.pending = []
+        self.pending_rows = 0
+
+    def add(self, X, labels):
+        index = build_index(X, labels)
+        self.pending.append(index)
+        self.pending_rows += len(index["counts"])
+        if self.merged is None or self.pending_rows > len(self.merged["counts"]):
+            self._merge()
+
+    def _merge(self):
+        self.merged = merge_index(self.merged, *self.pending)
+        self.pending, self.pending_rows = [], 0
+
+    def result(self):
+        if self.pending:
+            self._merge()
+        return self.merged
+
+# --------------------------------------------------
+# Superset Query
+# --------------------------------------------------
+
+class SymptomBitsetIndex:
+    """Finds diseases with at least one training row containing every queried symptom"""
+
+    def __init__(self, words, labels, counts, n_classes):
+        self.words = words
+        self.labels = labels
+        self.counts = counts
+        self.n_classes = n_classes
+
+    def match_counts(self, query):
+        """Number of training rows per disease (label order) that are supersets of the query"""
+        # A row is a superset when (row AND query) == query in every word
+        match = ((self.words & query) == query).all(axis=1)
+        return np.bincount(self.labels[match], weights=self.counts[match], minlength=self.n_classes).astype(np.int64)
+
+
+def load_index(model_dir, n_classes):
+    """Loads the bitset index saved by preprocess.py, or None if it has not been built"""
+    path = os.path.join(model_dir, BITSET_FILENAME)
+    if not os.path.exists(path):
+        return None
+    data = np.load(path)
+    return SymptomBitsetIndex(data["words"], data["labels"], data["counts"], n_classes)
@@ -0,0 +1,77 @@
+import os
+import time
+import numpy as np
+
+from inference import MODEL_DIR, TABLE_FILENAME, ModelBundle
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+# Number of ranked diseases kept per entry (matches the /predict top 5)
+TOP_K = 5
+
+# Rows per predict_proba call, bounds memory for large vocabularies
+CHUNK_SIZE = 8192
+
+# --------------------------------------------------
+# Build Table
+# --------------------------------------------------
+
+def enumerate_cases(n_features):
+    """Feature index pairs for every single symptom followed by every pair (i < j)"""
+    singles = np.arange(n_features)
+    pair_i, pair_j = np.triu_indices(n_features, k=1)
+    first = np.concatenate([singles, pair_i])
+    second = np.concatenate([singles, pair_j])
+    return first, second
+
+
+def build_table(bundle, k=TOP_K):
+    """Runs the model over all singles and pairs and keeps the top-k of each"""
+    first, second = enumerate_cases(bundle.n_features)
+    n_rows = len(first)
+
+    # uint16 is enough for any realistic number of diseases
+    index_dtype = np.uint16 if len(bundle.classes) <= np.iinfo(np.uint16).max else np.uint32
+    indices = np.empty((n_rows, k), dtype=index_dtype)
+    proba = np.empty((n_rows, k), dtype=np.float64)
+
+    for start in range(0, n_rows, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, n_rows)
+        rows = np.arange(stop - start)
+        X = np.zeros((stop - start, bundle.n_features), dtype=np.float32)
+        X[rows, first[start:stop]] = 1
+        X[rows, second[start:stop]] = 1
+        top_indices, top_proba = bundle.top_k(bundle.predict_proba(X), k)
+        indices[start:stop] = top_indices
+        proba[start:stop] = top_proba
+
+    return indices, proba
+
+
+def build_and_save(model_dir=MODEL_DIR):
+    """Builds the prediction table for the model in model_dir and saves it next to it"""
+    print("\nBuilding precomputed prediction table (all singles + pairs)...")
+    start = time.perf_counter()
+
+    bundle = ModelBundle(model_dir)
+    indices, proba = build_table(bundle)
+
+    path = os.path.join(model_dir, TABLE_FILENAME)
+    np.savez(
+        path,
+        model_version=np.array(bundle.version),
+        n_features=np.array(bundle.n_features),
+        indices=indices,
+        proba=proba,
+    )
+
+    print(f"Table rows    : {len(indices)} ({bundle.n_features} singles + pairs)")
+    print(f"Table size    : {(indices.nbytes + proba.nbytes) / 1024:.1f} KiB")
+    print(f"Build time    : {time.perf_counter() - start:.2f}s")
+    print(f"Table saved at: {path} (model version {bundle.version})")
+
+
+if __name__ == "__main__":
+    build_and_save()
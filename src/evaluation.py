@@ -0,0 +1,122 @@
+import os
+import json
+import numpy as np
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+REPORT_FILENAME = "evaluation_report.json"
+
+# Top-k accuracies reported (5 matches the top-5 list the API returns)
+TOP_KS = (1, 3, 5)
+
+# Equal-width confidence bins for the reliability table
+CALIBRATION_BINS = 10
+
+# --------------------------------------------------
+# Metrics From predict_proba
+# --------------------------------------------------
+
+def evaluate(y_true, proba, class_names, top_ks=TOP_KS, n_bins=CALIBRATION_BINS):
+    """Confusion matrix, per-class precision/recall, top-k accuracy and calibration in one pass"""
+    proba = np.asarray(proba, dtype=np.float64)
+    y_true = np.asarray(y_true)
+    n_rows, n_classes = proba.shape
+    rows = np.arange(n_rows)
+
+    # Classes sorted by probability; a stable sort breaks ties toward the lower index like argmax
+    order = np.argsort(-proba, axis=1, kind="stable")
+    y_pred = order[:, 0]
+    true_rank = np.argmax(order == y_true[:, None], axis=1)
+
+    # Confusion matrix (rows = true class, columns = predicted) from one bincount
+    confusion = np.bincount(y_true * n_classes + y_pred, minlength=n_classes * n_classes)
+    confusion = confusion.reshape(n_classes, n_classes)
+
+    tp = np.diag(confusion).astype(np.float64)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    precision = np.divide(tp, predicted, out=np.zeros(n_classes), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros(n_classes), where=support > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(n_classes),
+                   where=(precision + recall) > 0)
+
+    # Reliability of the top-1 confidence: per-bin accuracy vs mean confidence
+    confidence = proba[rows, y_pred]
+    correct = (y_pred == y_true).astype(np.float64)
+    bins = np.minimum((confidence * n_bins).astype(np.int64), n_bins - 1)
+    bin_count = np.bincount(bins, minlength=n_bins)
+    bin_confidence = np.bincount(bins, weights=confidence, minlength=n_bins)
+    bin_correct = np.bincount(bins, weights=correct, minlength=n_bins)
+    filled = bin_count > 0
+    ece = float(np.abs(bin_correct - bin_confidence)[filled].sum() / n_rows)
+
+    # Multi-class Brier score: sum_c (p_c - [c == y])^2 without building the one-hot matrix
+    p_true = proba[rows, y_true]
+    brier = float(((proba ** 2).sum(axis=1) - 2 * p_true + 1).mean())
+    log_loss = float(-np.log(np.clip(p_true, 1e-15, 1.0)).mean())
+
+    return {
+        "n_rows":   int(n_rows),
+        "accuracy": float(correct.mean()),
+        "top_k_accuracy": {str(k): float((true_rank < k).mean()) for k in top_ks},
+        "macro_avg": {
+            "precision": float(precision.mean()),
+            "recall":    float(recall.mean()),
+            "f1":        float(f1.mean()),
+        },
+        "per_class": [
+            {
+                "disease":   str(name),
+                "precision": float(precision[c]),
+                "recall":    float(recall[c]),
+                "f1":        float(f1[c]),
+                "support":   int(support[c]),
+            }
+            for c, name in enumerate(class_names)
+        ],
+        "confusion_matrix": {
+            "labels": [str(name) for name in class_names],
+            "counts": confusion.tolist(),
+        },
+        "calibration": {
+            "ece":      ece,
+            "brier":    brier,
+            "log_loss": log_loss,
+            "bins": [
+                {
+                    "lower":      b / n_bins,
+                    "upper":      (b + 1) / n_bins,
+                    "count":      int(bin_count[b]),
+                    "confidence": float(bin_confidence[b] / bin_count[b]),
+                    "accuracy":   float(bin_correct[b] / bin_count[b]),
+                }
+                for b in np.flatnonzero(filled)
+            ],
+        },
+    }
+
+# --------------------------------------------------
+# Report File
+# --------------------------------------------------
+
+def save_report(report, version, model_dir):
+    """Writes the report next to the model, tagged with the model version it describes"""
+    path = os.path.join(model_dir, REPORT_FILENAME)
+    with open(path, "w") as f:
+        json.dump({"model_version": version, **report}, f, indent=2)
+    return path
+
+
+def load_report(model_dir, version):
+    """Loads the evaluation report if it was written for the given model version"""
+    path = os.path.join(model_dir, REPORT_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        report = json.load(f)
+    if report.get("model_version") != version:
+        print(f"Ignoring stale evaluation report (written for {report.get('model_version')}, model is {version})")
+        return None
+    return report
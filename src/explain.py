@@ -0,0 +1,148 @@
+import os
+import time
+import joblib
+import numpy as np
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+MODEL_DIR = "models"
+CONTRIBUTIONS_FILENAME = "tree_contributions.npz"
+
+# Symptoms listed per explanation
+TOP_CONTRIBUTIONS = 5
+
+# --------------------------------------------------
+# Per-Node Contribution Deltas
+# --------------------------------------------------
+
+def flatten_forest(model):
+    """Concatenates all trees into per-node (class distribution, parent, parent split feature) arrays"""
+    values, parents, features = [], [], []
+    offsets = [0]
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        values.append(value / value.sum(axis=1, keepdims=True))
+
+        # Parent of every node (the root keeps -1), in forest-wide node ids
+        parent = np.full(tree.node_count, -1, dtype=np.int64)
+        internal = np.flatnonzero(tree.children_left >= 0)
+        parent[tree.children_left[internal]] = internal
+        parent[tree.children_right[internal]] = internal
+
+        has_parent = parent >= 0
+        features.append(np.where(has_parent, tree.feature[np.maximum(parent, 0)], -1).astype(np.int32))
+        parents.append(np.where(has_parent, parent + offsets[-1], -1))
+        offsets.append(offsets[-1] + tree.node_count)
+
+    return np.concatenate(values), np.concatenate(parents), np.concatenate(features), np.asarray(offsets)
+
+
+class TreeContributions:
+    """Flattened forest; one walk to the leaves yields both the proba and its attribution"""
+
+    def __init__(self, value, parent, node_feature, tree_offsets, n_features):
+        self.value = value                  # (n_nodes, n_classes) normalized class distribution
+        self.parent = parent                # (n_nodes,) parent node id, -1 for roots
+        self.node_feature = node_feature    # (n_nodes,) feature the parent split on
+        self.tree_offsets = tree_offsets    # (n_trees + 1,) first node id of every tree
+        self.n_features = n_features
+        self.n_trees = len(tree_offsets) - 1
+
+        # Mean root distribution: the prediction before any split
+        self.bias = value[tree_offsets[:-1]].mean(axis=0)
+
+    def leaves(self, model, X):
+        """Forest-wide leaf id reached in every tree, (rows x trees)"""
+        # Calling each tree's apply directly skips the per-call thread pool of the forest methods
+        return np.stack([e.tree_.apply(X) for e in model.estimators_], axis=1) + self.tree_offsets[:-1]
+
+    def update_leaves(self, model, X_row, leaves_row, features):
+        """Leaves after the given features flipped in X_row; only trees whose path splits on one are re-run"""
+        # A tree's leaf can only move if a node on its current root-to-leaf path tests a flipped feature
+        touched = np.zeros(self.n_trees, dtype=bool)
+        nodes = leaves_row.copy()
+        while True:
+            parents = self.parent[nodes]
+            inner = parents >= 0
+            if not inner.any():
+                break
+            touched |= inner & np.isin(self.node_feature[nodes], features)
+            nodes = np.where(inner, parents, nodes)
+
+        leaves_row = leaves_row.copy()
+        for t in np.flatnonzero(touched).tolist():
+            leaves_row[t] = model.estimators_[t].tree_.apply(X_row)[0] + self.tree_offsets[t]
+        return leaves_row, int(touched.sum())
+
+    def predict_proba(self, leaves):
+        """Same result as the forest's predict_proba: the mean leaf distribution"""
+        return self.value[leaves].mean(axis=1)
+
+    def feature_contributions(self, leaves_row, class_index):
+        """Per-feature change in one class's probability, summed from the leaves up to the roots"""
+        # Each step from a node to its parent is credited to the feature the parent split on
+        contributions = np.zeros(self.n_features)
+        nodes = leaves_row
+        while len(nodes):
+            parents = self.parent[nodes]
+            nodes, parents = nodes[parents >= 0], parents[parents >= 0]
+            contributions += np.bincount(
+                self.node_feature[nodes],
+                weights=self.value[nodes, class_index] - self.value[parents, class_index],
+                minlength=self.n_features,
+            )
+            nodes = parents
+        return contributions / self.n_trees
+
+# --------------------------------------------------
+# Save / Load
+# --------------------------------------------------
+
+def export_contributions(model, version, model_dir=MODEL_DIR):
+    """Precomputes the node deltas of a trained forest and saves them next to the model"""
+    if not hasattr(model, "estimators_"):
+        print("Skipping contribution export (only forests are decomposed per node)")
+        return None
+
+    print("\nExporting flattened forest for explanations...")
+    start = time.perf_counter()
+    value, parent, node_feature, tree_offsets = flatten_forest(model)
+
+    path = os.path.join(model_dir, CONTRIBUTIONS_FILENAME)
+    np.savez(
+        path,
+        model_version=np.array(version),
+        n_features=np.array(model.n_features_in_),
+        value=value,
+        parent=parent,
+        node_feature=node_feature,
+        tree_offsets=tree_offsets,
+    )
+
+    print(f"Nodes         : {len(parent)} across {len(model.estimators_)} trees")
+    print(f"Export time   : {time.perf_counter() - start:.2f}s")
+    print(f"Saved at      : {path} (model version {version})")
+    return path
+
+
+def load_contributions(model_dir, version):
+    """Loads the node deltas if they were exported for the given model version"""
+    path = os.path.join(model_dir, CONTRIBUTIONS_FILENAME)
+    if not os.path.exists(path):
+        return None
+    data = np.load(path)
+    if str(data["model_version"]) != version:
+        print(f"Ignoring stale contributions (exported for {data['model_version']}, model is {version})")
+        return None
+    return TreeContributions(
+        data["value"], data["parent"], data["node_feature"], data["tree_offsets"], int(data["n_features"]),
+    )
+
+
+if __name__ == "__main__":
+    # Re-export for the saved model (inference imports this module, so import it here)
+    from inference import model_version
+    export_contributions(joblib.load(os.path.join(MODEL_DIR, "disease_model.pkl")), model_version(MODEL_DIR))
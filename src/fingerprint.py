@@ -0,0 +1,47 @@
+import os
+import json
+import hashlib
+
+# --------------------------------------------------
+# Content Hashing
+# --------------------------------------------------
+
+# Read size when hashing large files
+BLOCK_SIZE = 1 << 20
+
+
+def file_digest(path, size=None):
+    """SHA-256 of a file's content (or of its first `size` bytes), read in blocks"""
+    digest = hashlib.sha256()
+    remaining = os.path.getsize(path) if size is None else size
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def value_digest(*values):
+    """SHA-256 of JSON-serializable values (e.g. cleaning rules or hyperparameters)"""
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+# --------------------------------------------------
+# Stage Cache Records
+# --------------------------------------------------
+
+def load_record(path):
+    """Returns the cache record saved by a previous run, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_record(path, record):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
@@ -0,0 +1,329 @@
+import os
+import json
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from backends import backend_name, linear_scorer
+from bitset_index import load_index, pack_indices
+from evaluation import load_report
+from explain import TOP_CONTRIBUTIONS, load_contributions
+from next_symptom import rank_next_symptoms, symptom_likelihoods
+from thread_policy import ThreadPolicy
+
+# --------------------------------------------------
+# Paths
+# --------------------------------------------------
+
+# Default location of the artifacts written by preprocess.py / train_model.py
+MODEL_DIR = "models"
+
+# --------------------------------------------------
+# Model Version
+# --------------------------------------------------
+
+def model_version(model_dir=MODEL_DIR):
+    """Returns the model version recorded by train_model.py (or hashes the pickle)"""
+    info_path = os.path.join(model_dir, "model_info.json")
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            return json.load(f)["version"]
+    with open(os.path.join(model_dir, "disease_model.pkl"), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def save_versioned_model(model, info, model_dir=MODEL_DIR):
+    """Pickles the model, versions it by the pickle's hash and writes model_info.json"""
+    os.makedirs(model_dir, exist_ok=True)
+    model_path = os.path.join(model_dir, "disease_model.pkl")
+    joblib.dump(model, model_path)
+
+    # Version the model by the hash of its pickle so derived artifacts can detect staleness
+    with open(model_path, "rb") as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:12]
+
+    with open(os.path.join(model_dir, "model_info.json"), "w") as f:
+        json.dump(
+            {
+                "version":      version,
+                "backend":      backend_name(model),
+                "n_estimators": len(getattr(model, "estimators_", [])) or None,
+                **info,
+            },
+            f,
+            indent=2,
+        )
+    return version
+
+# --------------------------------------------------
+# Precomputed Prediction Table
+# --------------------------------------------------
+
+TABLE_FILENAME = "prediction_table.npz"
+
+
+def pair_offset(i, j, n_features):
+    """Position of the symptom pair (i, j), i < j, in np.triu_indices(n_features, 1) order"""
+    return i * (2 * n_features - i - 1) // 2 + (j - i - 1)
+
+
+class PredictionTable:
+    """Top-k results for every single symptom and symptom pair, indexed directly"""
+
+    def __init__(self, indices, proba, n_features):
+        self.indices = indices          # (rows, k) class indices, best first
+        self.proba = proba              # (rows, k) matching probabilities
+        self.n_features = n_features
+
+    def row(self, feature_indices):
+        """Table row for a set of 1-2 distinct feature indices, or None"""
+        unique = sorted(set(feature_indices))
+        if len(unique) == 1:
+            return unique[0]
+        if len(unique) == 2:
+            return self.n_features + pair_offset(unique[0], unique[1], self.n_features)
+        return None
+
+    def get(self, feature_indices):
+        row = self.row(feature_indices)
+        if row is None:
+            return None
+        return self.indices[row], self.proba[row]
+
+
+def load_table(model_dir, version):
+    """Loads the prediction table if it was built for the given model version"""
+    path = os.path.join(model_dir, TABLE_FILENAME)
+    if not os.path.exists(path):
+        return None
+    data = np.load(path)
+    if str(data["model_version"]) != version:
+        print(f"Ignoring stale prediction table (built for {data['model_version']}, model is {version})")
+        return None
+    return PredictionTable(data["indices"], data["proba"], int(data["n_features"]))
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+# Batches are built as CSR instead of dense rows once the vocabulary is this large
+SPARSE_MIN_FEATURES = 1024
+
+# --------------------------------------------------
+# Input Parsing
+# --------------------------------------------------
+
+def parse_symptoms(user_input):
+    """Splits a comma-separated symptom string into normalized symptom names"""
+    return [
+        sym.strip().lower().replace(" ", "_")
+        for sym in user_input.split(",")
+        if sym.strip()
+    ]
+
+# --------------------------------------------------
+# Model Bundle
+# --------------------------------------------------
+
+class ModelBundle:
+    """Trained model plus the encoders needed to turn symptoms into predictions"""
+
+    def __init__(self, model_dir=MODEL_DIR, thread_policy=None):
+        self.model_dir = model_dir
+
+        # Load the trained model, label encoder, and original feature names
+        self.model = joblib.load(os.path.join(model_dir, "disease_model.pkl"))
+        self.label_encoder = joblib.load(os.path.join(model_dir, "label_encoder.pkl"))
+        self.feature_columns = joblib.load(os.path.join(model_dir, "feature_columns.pkl"))
+
+        # Column names are checked once here; dropping them lets NumPy/CSR input skip
+        # the per-call DataFrame construction and sklearn's feature-name validation
+        trained_names = getattr(self.model, "feature_names_in_", None)
+        if trained_names is not None:
+            if list(trained_names) != list(self.feature_columns):
+                raise ValueError(f"{model_dir}: model features do not match feature_columns.pkl")
+            del self.model.feature_names_in_
+
+        # The pickle keeps training's n_jobs=-1; requests predict serially unless the batch is large
+        self.thread_policy = thread_policy or ThreadPolicy()
+        self.thread_policy.configure_model(self.model)
+
+        # Naive Bayes / logistic backends are served as one gather-and-sum over active symptoms
+        self.backend = backend_name(self.model)
+        self.scorer = linear_scorer(self.model)
+
+        # Normalized feature names and their column positions for fast lookup
+        self.clean_feature_columns = [col.strip().lower() for col in self.feature_columns]
+        self.feature_index = {name: i for i, name in enumerate(self.clean_feature_columns)}
+
+        # Class names indexed by predict_proba column (replaces inverse_transform calls)
+        self.classes = np.asarray(self.label_encoder.classes_)[self.model.classes_]
+
+        self.version = model_version(model_dir)
+
+        # Precomputed single/pair results, used only if built for this exact model
+        self.table = load_table(model_dir, self.version)
+
+        # Hold-out metrics written by train_model.py for this exact model
+        self.report = load_report(model_dir, self.version)
+
+        # Flattened forest (node distributions + parents) for explaining forest predictions
+        self.contributions = load_contributions(model_dir, self.version)
+
+        # P(symptom | disease) and disease prior from preprocess.py's co-occurrence counts
+        self.likelihood, self.class_prior = None, None
+        cooccurrence_path = os.path.join(model_dir, "symptom_cooccurrence.pkl")
+        if os.path.exists(cooccurrence_path):
+            cooccurrence = joblib.load(cooccurrence_path)
+            self.likelihood = symptom_likelihoods(cooccurrence)[self.model.classes_]
+            class_counts = np.asarray(cooccurrence["class_counts"], dtype=np.float64)[self.model.classes_]
+            self.class_prior = class_counts / class_counts.sum()
+
+        # Bit-packed training rows from preprocess.py (label-encoder order, not model columns)
+        self.bitset_index = load_index(model_dir, len(self.label_encoder.classes_))
+
+    @property
+    def n_features(self):
+        return len(self.feature_columns)
+
+    def resolve(self, symptoms):
+        """Maps normalized symptom names to feature indices, keeping unknown names aside"""
+        indices, recognized, unrecognized = [], [], []
+        for symptom in symptoms:
+            i = self.feature_index.get(symptom)
+            if i is None:
+                unrecognized.append(symptom)
+            else:
+                indices.append(i)
+                recognized.append(symptom)
+        return indices, recognized, unrecognized
+
+    def vectorize(self, index_lists):
+        """Builds the one-hot input matrix (one row per list of feature indices)"""
+        X = np.zeros((len(index_lists), self.n_features), dtype=np.float32)
+        for row, indices in enumerate(index_lists):
+            X[row, indices] = 1
+        return X
+
+    def vectorize_sparse(self, index_lists):
+        """Builds the one-hot input as CSR, never allocating the dense (rows x features) matrix"""
+        # A symptom repeated in one case collapses to a single column entry
+        index_lists = [sorted(set(indices)) for indices in index_lists]
+        indptr = np.zeros(len(index_lists) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for indices in index_lists], out=indptr[1:])
+        indices = np.fromiter(
+            (i for row in index_lists for i in row), dtype=np.int32, count=int(indptr[-1])
+        )
+        data = np.ones(len(indices), dtype=np.float32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(index_lists), self.n_features))
+
+    def vectorize_batch(self, index_lists):
+        """Dense rows for small vocabularies, CSR once the vocabulary is large"""
+        if self.n_features >= SPARSE_MIN_FEATURES:
+            return self.vectorize_sparse(index_lists)
+        return self.vectorize(index_lists)
+
+    def predict_proba(self, X):
+        """Runs the model on a one-hot matrix (dense or CSR) and returns the probability matrix"""
+        if self.scorer is not None:
+            return self.scorer.predict_proba(X)
+        return self.thread_policy.predict_proba(self.model, X)
+
+    def predict_indices(self, index_lists):
+        """Probability matrix for lists of active feature indices, via the cheapest path"""
+        if self.scorer is not None:
+            return self.scorer.predict_proba_indices(index_lists)
+        return self.thread_policy.predict_proba(self.model, self.vectorize_batch(index_lists))
+
+    def explain(self, indices, top=TOP_CONTRIBUTIONS):
+        """Probability row plus the symptoms that raised the top class most, from one tree pass"""
+        leaves = self.contributions.leaves(self.model, self.vectorize([indices]))
+        proba = self.contributions.predict_proba(leaves)
+        best = int(self.top_k(proba[0], 1)[0][0, 0])
+        contributions = self.contributions.feature_contributions(leaves[0], best)
+
+        selected = set(indices)
+        order = np.argsort(-contributions, kind="stable")[:top]
+        explanation = {
+            "disease":  str(self.classes[best]),
+            "baseline": float(self.contributions.bias[best] * 100),
+            "contributions": [
+                {
+                    "symptom":      self.clean_feature_columns[j],
+                    "contribution": float(contributions[j] * 100),
+                    "selected":     j in selected,
+                }
+                for j in order.tolist()
+                if contributions[j] > 0
+            ],
+        }
+        return proba, explanation
+
+    def top_k(self, proba, k=5):
+        """Returns (indices, probabilities) of the k most likely classes for each row"""
+        proba = np.atleast_2d(proba)
+        k = min(k, proba.shape[1])
+        # argpartition + a small sort is cheaper than sorting the whole distribution
+        # (sorted by column first so ties resolve to the lowest index, like argmax)
+        part = np.sort(np.argpartition(-proba, k - 1, axis=1)[:, :k], axis=1)
+        part_proba = np.take_along_axis(proba, part, axis=1)
+        order = np.argsort(-part_proba, axis=1, kind="stable")
+        indices = np.take_along_axis(part, order, axis=1)
+        return indices, np.take_along_axis(proba, indices, axis=1)
+
+    def lookup(self, indices):
+        """Returns precomputed (indices, probabilities) for 1-2 symptoms, or None"""
+        if self.table is None:
+            return None
+        return self.table.get(indices)
+
+    def suggest_next(self, indices, top=10):
+        """Ranks unselected symptoms by expected information gain over the current prediction"""
+        # With nothing selected yet the training class balance is the best prior
+        prior = self.predict_indices([indices])[0] if indices else self.class_prior
+        order, gains = rank_next_symptoms(prior, self.likelihood, indices, top)
+        return prior, order, gains
+
+    def consistent_diseases(self, indices):
+        """Diseases with a training row containing all given symptoms, with match counts"""
+        counts = self.bitset_index.match_counts(pack_indices(indices, self.n_features))
+        labels = np.flatnonzero(counts)
+        # Most supporting rows first
+        labels = labels[np.argsort(-counts[labels], kind="stable")]
+        return self.label_encoder.classes_[labels], counts[labels]
+
+    def build_result(self, proba_row, recognized, unrecognized, k=5):
+        """Formats one probability row as the /predict response payload"""
+        indices, probs = self.top_k(proba_row, k)
+        return self.format_result(indices[0], probs[0], recognized, unrecognized)
+
+    def format_result(self, top_indices, top_proba, recognized, unrecognized):
+        """Formats ranked class indices and probabilities as the /predict response payload"""
+        names = self.classes[top_indices].tolist()
+        percents = (top_proba * 100).tolist()
+        return {
+            "predicted_disease":     names[0],
+            "confidence":            percents[0],
+            "recognized_symptoms":   recognized,
+            "unrecognized_symptoms": unrecognized,
+            "top5": [
+                {"disease": name, "probability": pct}
+                for name, pct in zip(names, percents)
+            ],
+        }
+
+# --------------------------------------------------
+# Warm-Up Samples
+# --------------------------------------------------
+
+def representative_cases(bundle, processed_data_path):
+    """Returns one symptom string per disease from the processed training data"""
+    # Without the processed data, fall back to one case per symptom
+    if not os.path.exists(processed_data_path):
+        return list(bundle.clean_feature_columns)
+
+    df = pd.read_csv(processed_data_path)
+    rows = df.groupby("Disease", sort=True).head(1).drop(columns="Disease")
+    names = np.asarray([col.strip().lower() for col in rows.columns])
+    return [", ".join(names[row.astype(bool)]) for row in rows.to_numpy()]
@@ -0,0 +1,90 @@
+import os
+import json
+import numpy as np
+
+# --------------------------------------------------
+# Paths
+# --------------------------------------------------
+
+# Appendable on-disk copy of the encoded dataset (written by preprocess.py --stream)
+MATRIX_DIR = "data/processed/matrix"
+
+FEATURES_FILE = "features.u8"      # (rows x features) uint8, row-major
+LABELS_FILE = "labels.i32"         # (rows,) int32 label-encoded diseases
+META_FILE = "matrix.json"          # row count + vocabulary
+
+FEATURE_DTYPE = np.uint8
+LABEL_DTYPE = np.int32
+
+# --------------------------------------------------
+# Writer
+# --------------------------------------------------
+
+class MatrixWriter:
+    """Appends encoded chunks to raw binary files so memory stays bounded"""
+
+    def __init__(self, feature_columns, classes, matrix_dir=MATRIX_DIR, append=False):
+        self.matrix_dir = matrix_dir
+        self.feature_columns = list(feature_columns)
+        self.classes = list(classes)
+        self.n_rows = 0
+
+        os.makedirs(matrix_dir, exist_ok=True)
+        mode = "ab" if append else "wb"
+        if append:
+            self.n_rows = read_meta(matrix_dir)["n_rows"]
+        self.features_file = open(os.path.join(matrix_dir, FEATURES_FILE), mode)
+        self.labels_file = open(os.path.join(matrix_dir, LABELS_FILE), mode)
+
+        # Drop any partial rows left behind by an interrupted append
+        if append:
+            self.features_file.truncate(self.n_rows * len(self.feature_columns))
+            self.labels_file.truncate(self.n_rows * np.dtype(LABEL_DTYPE).itemsize)
+
+    def append(self, X, y):
+        """Writes one chunk of encoded rows and their labels"""
+        self.features_file.write(np.ascontiguousarray(X, dtype=FEATURE_DTYPE).tobytes())
+        self.labels_file.write(np.ascontiguousarray(y, dtype=LABEL_DTYPE).tobytes())
+        self.n_rows += len(y)
+
+    def close(self):
+        """Flushes the data files, then records the row count and vocabulary"""
+        self.features_file.close()
+        self.labels_file.close()
+        with open(os.path.join(self.matrix_dir, META_FILE), "w") as f:
+            json.dump(
+                {
+                    "n_rows":          self.n_rows,
+                    "feature_columns": self.feature_columns,
+                    "classes":         self.classes,
+                },
+                f,
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --------------------------------------------------
+# Reader
+# --------------------------------------------------
+
+def read_meta(matrix_dir=MATRIX_DIR):
+    with open(os.path.join(matrix_dir, META_FILE)) as f:
+        return json.load(f)
+
+
+def open_matrix(matrix_dir=MATRIX_DIR):
+    """Memory-maps the stored matrix, returning (X, y, meta) without loading it into RAM"""
+    meta = read_meta(matrix_dir)
+    n_rows, n_features = meta["n_rows"], len(meta["feature_columns"])
+
+    # Only the rows recorded in the metadata are valid (a crashed append may leave extra bytes)
+    X = np.memmap(
+        os.path.join(matrix_dir, FEATURES_FILE), dtype=FEATURE_DTYPE, mode="r",
+        shape=(n_rows, n_features),
+    )
+    y = np.memmap(os.path.join(matrix_dir, LABELS_FILE), dtype=LABEL_DTYPE, mode="r", shape=(n_rows,))
+    return X, y, meta
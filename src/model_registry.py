@@ -0,0 +1,248 @@
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import threading
+import numpy as np
+from collections import OrderedDict, deque
+
+from bitset_index import BITSET_FILENAME
+from evaluation import REPORT_FILENAME
+from explain import CONTRIBUTIONS_FILENAME
+from inference import MODEL_DIR, TABLE_FILENAME, ModelBundle, model_version
+
+# --------------------------------------------------
+# Settings (overridable through the environment)
+# --------------------------------------------------
+
+# Published variants live in <REGISTRY_DIR>/<name>/<version>/, each a copy of a models/ directory
+REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", os.path.join(MODEL_DIR, "registry"))
+
+# Resident bundles are evicted least recently used first once their artifacts exceed this
+MEMORY_BUDGET_MB = float(os.environ.get("MODEL_REGISTRY_MEMORY_MB", 1024))
+
+# Name of the version a bare model name resolves to, written by `publish`
+LATEST_FILENAME = "LATEST"
+
+# Seconds a resolved name / version is reused before the disk is checked again (so new publishes show up)
+RESOLVE_TTL_S = float(os.environ.get("MODEL_REGISTRY_RESOLVE_TTL_S", 5))
+
+# Artifacts a bundle loads; everything else in models/ (caches, search results) stays behind
+ARTIFACTS = (
+    "disease_model.pkl", "label_encoder.pkl", "feature_columns.pkl", "model_info.json",
+    "symptom_cooccurrence.pkl", BITSET_FILENAME, REPORT_FILENAME, CONTRIBUTIONS_FILENAME, TABLE_FILENAME,
+)
+
+# Names and versions become directory names, so only plain identifiers are accepted
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+# Load / evict events and per-model latencies kept for /models
+RECENT_EVENTS = 100
+RECENT_LATENCIES = 1000
+
+# --------------------------------------------------
+# Publishing
+# --------------------------------------------------
+
+def publish(name, source_dir=MODEL_DIR, registry_dir=REGISTRY_DIR):
+    """Copies a trained models/ directory into the registry under its version and marks it latest"""
+    if not NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid model name: {name!r}")
+    version = model_version(source_dir)
+    target = os.path.join(registry_dir, name, version)
+    os.makedirs(target, exist_ok=True)
+    for filename in ARTIFACTS:
+        path = os.path.join(source_dir, filename)
+        if os.path.exists(path):
+            shutil.copy2(path, os.path.join(target, filename))
+
+    with open(os.path.join(registry_dir, name, LATEST_FILENAME), "w") as f:
+        f.write(version)
+    return version
+
+
+def bundle_size_bytes(model_dir):
+    """On-disk size of a bundle's artifacts, used as the estimate of its resident memory"""
+    return sum(
+        os.path.getsize(os.path.join(model_dir, filename))
+        for filename in ARTIFACTS
+        if os.path.exists(os.path.join(model_dir, filename))
+    )
+
+# --------------------------------------------------
+# Model Registry
+# --------------------------------------------------
+
+class ModelRegistry:
+    """Loads published bundles on demand and keeps the most recently used ones under a memory budget"""
+
+    def __init__(self, registry_dir=REGISTRY_DIR, memory_budget_mb=MEMORY_BUDGET_MB, thread_policy=None,
+                 resolve_ttl_s=RESOLVE_TTL_S):
+        self.registry_dir = registry_dir
+        self.budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.thread_policy = thread_policy
+        self.resolve_ttl_s = resolve_ttl_s
+
+        self._lock = threading.Lock()
+        self._resident = OrderedDict()          # (name, version) -> (bundle, size in bytes), LRU first
+        self._loading = {}                      # (name, version) -> lock held while it loads
+        self._resolved = {}                     # (name, requested version) -> ((name, version), expiry)
+        self.events = deque(maxlen=RECENT_EVENTS)
+        self.counts = {"hits": 0, "loads": 0, "evictions": 0, "load_errors": 0}
+        self.latencies = {}                     # "name@version" -> deque of ms
+
+    def available(self):
+        """Published names with their versions and the latest one"""
+        if not os.path.isdir(self.registry_dir):
+            return {}
+        models = {}
+        for name in sorted(os.listdir(self.registry_dir)):
+            path = os.path.join(self.registry_dir, name)
+            if not NAME_PATTERN.match(name) or not os.path.isdir(path):
+                continue
+            versions = sorted(v for v in os.listdir(path) if os.path.isdir(os.path.join(path, v)))
+            models[name] = {"versions": versions, "latest": self.latest(name)}
+        return models
+
+    def latest(self, name):
+        path = os.path.join(self.registry_dir, name, LATEST_FILENAME)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().strip()
+
+    def resolve(self, name, version=None):
+        """The (name, version) key of a published bundle; KeyError if there is none"""
+        if not isinstance(name, str) or not isinstance(version, (str, type(None))):
+            raise KeyError(name)
+
+        # Successful lookups are cached, so requests do not read LATEST and stat the registry every time
+        with self._lock:
+            cached = self._resolved.get((name, version))
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        if not NAME_PATTERN.match(name) or (version is not None and not NAME_PATTERN.match(version)):
+            raise KeyError(name)
+        resolved = version or self.latest(name)
+        if resolved is None or not os.path.isdir(os.path.join(self.registry_dir, name, resolved)):
+            raise KeyError(name)
+        with self._lock:
+            self._resolved[(name, version)] = ((name, resolved), time.monotonic() + self.resolve_ttl_s)
+        return name, resolved
+
+    def reload(self):
+        """Forgets cached resolutions, so the next request sees the registry as it is on disk now"""
+        with self._lock:
+            self._resolved.clear()
+
+    def get(self, name, version=None):
+        """The bundle for a model name (latest version unless given), loading it if needed"""
+        key = self.resolve(name, version)
+        with self._lock:
+            if key in self._resident:
+                self._resident.move_to_end(key)
+                self.counts["hits"] += 1
+                return self._resident[key][0]
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Concurrent requests for the same cold model wait for one load instead of each loading it
+        with load_lock:
+            with self._lock:
+                if key in self._resident:
+                    self._resident.move_to_end(key)
+                    self.counts["hits"] += 1
+                    return self._resident[key][0]
+            return self._load(key)
+
+    def _load(self, key):
+        name, version = key
+        model_dir = os.path.join(self.registry_dir, name, version)
+        start = time.perf_counter()
+        try:
+            bundle = ModelBundle(model_dir, thread_policy=self.thread_policy)
+        except Exception:
+            with self._lock:
+                self.counts["load_errors"] += 1
+                self._loading.pop(key, None)
+            self.reload()
+            raise
+        load_ms = (time.perf_counter() - start) * 1000
+        size = bundle_size_bytes(model_dir)
+
+        with self._lock:
+            self._resident[key] = (bundle, size)
+            self._loading.pop(key, None)
+            self.counts["loads"] += 1
+            self._event("load", key, size, load_ms)
+            self._evict(keep=key)
+        return bundle
+
+    def _evict(self, keep):
+        """Drops least recently used bundles until the budget fits (never the one just loaded)"""
+        while self.resident_bytes() > self.budget_bytes:
+            victim = next((key for key in self._resident if key != keep), None)
+            if victim is None:
+                break
+            _, size = self._resident.pop(victim)
+            self.counts["evictions"] += 1
+            self._event("evict", victim, size)
+
+    def _event(self, event, key, size, load_ms=None):
+        record = {"ts": round(time.time(), 3), "event": event, "model": key[0], "version": key[1],
+                  "size_mb": round(size / 1024 / 1024, 1)}
+        if load_ms is not None:
+            record["load_ms"] = round(load_ms, 1)
+        self.events.append(record)
+        print(f"Model registry: {event} {key[0]}@{key[1]} ({record['size_mb']} MB)")
+
+    def resident_bytes(self):
+        return sum(size for _, size in self._resident.values())
+
+    def record_latency(self, name, version, latency_ms):
+        with self._lock:
+            self.latencies.setdefault(f"{name}@{version}", deque(maxlen=RECENT_LATENCIES)).append(latency_ms)
+
+    def metrics(self):
+        with self._lock:
+            latency = {}
+            for key, values in self.latencies.items():
+                values = np.asarray(values)
+                latency[key] = {
+                    "requests": len(values),
+                    "p50_ms":   round(float(np.percentile(values, 50)), 3),
+                    "p99_ms":   round(float(np.percentile(values, 99)), 3),
+                }
+            return {
+                "budget_mb":   round(self.budget_bytes / 1024 / 1024, 1),
+                "resident_mb": round(self.resident_bytes() / 1024 / 1024, 1),
+                "resident":    [f"{name}@{version}" for name, version in self._resident],
+                **self.counts,
+                "latency":     latency,
+                "events":      list(self.events),
+            }
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish trained models as named variants for app.py to serve.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    publish_parser = sub.add_parser("publish", help="copy a trained models/ directory into the registry")
+    publish_parser.add_argument("name", help="variant name, e.g. eu-west")
+    publish_parser.add_argument("--from", dest="source", default=MODEL_DIR, help="trained model directory")
+    sub.add_parser("list", help="list published variants and versions")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        try:
+            version = publish(args.name, args.source)
+        except (ValueError, FileNotFoundError) as exc:
+            sys.exit(str(exc))
+        print(f"Published {args.name}@{version} to {os.path.join(REGISTRY_DIR, args.name, version)}")
+    else:
+        for name, info in ModelRegistry().available().items():
+            print(f"{name:<20} latest {info['latest']}  versions {', '.join(info['versions'])}")
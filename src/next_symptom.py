@@ -0,0 +1,62 @@
+import numpy as np
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+# Laplace smoothing for P(symptom | disease) estimated from co-occurrence counts
+SMOOTHING = 1.0
+
+# --------------------------------------------------
+# Likelihood Matrix
+# --------------------------------------------------
+
+def symptom_likelihoods(cooccurrence, smoothing=SMOOTHING):
+    """Builds the (diseases x symptoms) matrix of P(symptom present | disease)"""
+    counts = np.asarray(cooccurrence["counts"], dtype=np.float64)
+    class_counts = np.asarray(cooccurrence["class_counts"], dtype=np.float64)
+    return (counts + smoothing) / (class_counts[:, None] + 2 * smoothing)
+
+# --------------------------------------------------
+# Expected Information Gain
+# --------------------------------------------------
+
+def entropy(p, axis=-1):
+    """Shannon entropy in bits, treating 0 * log(0) as 0"""
+    p = np.asarray(p, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(p > 0, p * np.log2(p), 0.0)
+    return -terms.sum(axis=axis)
+
+
+def expected_information_gain(prior, likelihood):
+    """Expected entropy reduction (bits) of the disease distribution for every symptom at once"""
+    # prior: (n_diseases,) current distribution, likelihood: (n_diseases, n_symptoms)
+    prior = np.asarray(prior, dtype=np.float64)
+    prior = prior / prior.sum()
+
+    # Joint P(disease, answer) for every candidate symptom, both answers
+    joint_yes = prior[:, None] * likelihood
+    joint_no = prior[:, None] * (1.0 - likelihood)
+
+    # Marginal probability of each answer
+    p_yes = joint_yes.sum(axis=0)
+    p_no = joint_no.sum(axis=0)
+
+    # Posterior disease distribution for each answer (columns sum to 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        post_yes = np.where(p_yes > 0, joint_yes / p_yes, 0.0)
+        post_no = np.where(p_no > 0, joint_no / p_no, 0.0)
+
+    expected_entropy = p_yes * entropy(post_yes, axis=0) + p_no * entropy(post_no, axis=0)
+    return entropy(prior) - expected_entropy
+
+
+def rank_next_symptoms(prior, likelihood, selected, top=10):
+    """Returns (symptom indices, gains) of the best unselected symptoms to ask about"""
+    gains = expected_information_gain(prior, likelihood)
+    gains[list(selected)] = -np.inf
+
+    top = min(top, len(gains) - len(set(selected)))
+    order = np.argsort(-gains, kind="stable")[:max(top, 0)]
+    return order, gains[order]
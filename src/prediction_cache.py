@@ -0,0 +1,218 @@
+import os
+import gzip
+import json
+import queue
+import sqlite3
+import argparse
+import threading
+import numpy as np
+
+from bitset_index import pack_indices
+from inference import ModelBundle, parse_symptoms
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+# One file shared by every worker process on the host; survives restarts
+CACHE_PATH = "models/prediction_cache.sqlite3"
+
+# Oldest entries beyond this count are evicted (first in, first out, so reads never write)
+MAX_ENTRIES = 100_000
+
+# Inserts a process makes between eviction passes
+EVICT_EVERY = 1_000
+
+# A busy writer skips its insert instead of waiting long for the file
+WRITE_TIMEOUT_S = 0.05
+
+# Entries waiting for the background writer; when full, new ones are dropped (they are only a cache)
+WRITE_QUEUE_SIZE = 10_000
+WRITE_BATCH_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id      INTEGER PRIMARY KEY,
+    version TEXT NOT NULL,
+    bitset  BLOB NOT NULL,
+    classes BLOB NOT NULL,
+    proba   BLOB NOT NULL,
+    UNIQUE (version, bitset)
+)
+"""
+
+# --------------------------------------------------
+# Shared Prediction Cache
+# --------------------------------------------------
+
+class PredictionCache:
+    """Top-k results keyed by (model version, symptom bitset) in a SQLite file in WAL mode"""
+
+    def __init__(self, path, version, n_features, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.version = version
+        self.n_features = n_features
+        self.max_entries = max_entries
+        self.inserts = 0
+        self.dropped = 0
+
+        # Misses are stored by one background thread, started on the first put
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+        # sqlite3 connections are per thread; WAL lets readers run alongside a writer
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection().execute(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=WRITE_TIMEOUT_S, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def key(self, indices):
+        """Canonical key: the packed bitset, so order and repeats of symptoms do not matter"""
+        return pack_indices(indices, self.n_features).tobytes()
+
+    def get(self, indices):
+        """Returns cached (class indices, probabilities) for this model version, or None"""
+        try:
+            row = self._connection().execute(
+                "SELECT classes, proba FROM predictions WHERE version = ? AND bitset = ?",
+                (self.version, self.key(indices)),
+            ).fetchone()
+        except sqlite3.Error:
+            # A locked, corrupt or missing cache file is a miss; the model answers instead
+            return None
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.int32), np.frombuffer(row[1], dtype=np.float64)
+
+    def put(self, indices, top_indices, top_proba):
+        """Queues one entry for the background writer; never blocks the request on SQLite"""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="prediction-cache", daemon=True)
+                    self._writer.start()
+        try:
+            self._queue.put_nowait((indices, top_indices, top_proba))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        while True:
+            entries = [self._queue.get()]
+            while len(entries) < WRITE_BATCH_SIZE:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.put_many(entries)
+
+    def put_many(self, entries):
+        """Stores (indices, top class indices, top probabilities) entries; skipped if the file is busy"""
+        rows = [
+            (
+                self.version,
+                self.key(indices),
+                np.asarray(top_indices, dtype=np.int32).tobytes(),
+                np.asarray(top_proba, dtype=np.float64).tobytes(),
+            )
+            for indices, top_indices, top_proba in entries
+        ]
+        try:
+            self._connection().executemany(
+                "INSERT OR IGNORE INTO predictions (version, bitset, classes, proba) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        except sqlite3.Error:
+            return
+
+        self.inserts += len(rows)
+        if self.inserts >= EVICT_EVERY:
+            self.inserts = 0
+            self.evict()
+
+    def evict(self):
+        """Drops the oldest entries beyond max_entries (ids only grow, so low ids are oldest)"""
+        try:
+            self._connection().execute(
+                "DELETE FROM predictions WHERE id <= (SELECT MAX(id) FROM predictions) - ?",
+                (self.max_entries,),
+            )
+        except sqlite3.OperationalError:
+            pass
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+# --------------------------------------------------
+# Pre-Population From Request Logs
+# --------------------------------------------------
+
+def logged_symptoms(path):
+    """Yields symptom strings from a log: JSON lines with "symptoms" / "cases", or one string per line"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line
+                continue
+            if not isinstance(record, dict):
+                continue
+            cases = record.get("cases") or [record.get("symptoms")]
+            if not isinstance(cases, list):
+                cases = [cases]
+            for case in cases:
+                if isinstance(case, list):
+                    case = ", ".join(case)
+                if case:
+                    yield str(case)
+
+
+def populate(cache, bundle, log_paths, batch_size=4096):
+    """Predicts every distinct logged symptom set once and stores it in the cache"""
+    seen, pending, added = set(), [], 0
+    for path in log_paths:
+        for symptoms in logged_symptoms(path):
+            indices = bundle.resolve(parse_symptoms(symptoms))[0]
+            key = cache.key(indices) if indices else None
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            pending.append(indices)
+            if len(pending) == batch_size:
+                added += store_batch(cache, bundle, pending)
+                pending = []
+    if pending:
+        added += store_batch(cache, bundle, pending)
+    return added
+
+
+def store_batch(cache, bundle, index_lists):
+    top_indices, top_proba = bundle.top_k(bundle.predict_indices(index_lists))
+    cache.put_many(zip(index_lists, top_indices, top_proba))
+    return len(index_lists)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-populate the shared prediction cache from request logs.")
+    parser.add_argument("logs", nargs="+", help="JSONL request logs or text files with one symptom string per line")
+    parser.add_argument("--cache", default=CACHE_PATH)
+    args = parser.parse_args()
+
+    bundle = ModelBundle()
+    cache = PredictionCache(args.cache, bundle.version, bundle.n_features)
+    added = populate(cache, bundle, args.logs)
+    print(f"Cached {added} distinct symptom set(s) for model {bundle.version}; {len(cache)} entries in {args.cache}")
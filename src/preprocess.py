@@ -1,8 +1,19 @@
 import pandas as pd
+import numpy as np
+import io
 import os
+import json
+import time
+import inspect
 import joblib
+import argparse
+from scipy import sparse
 from sklearn.preprocessing import LabelEncoder
 
+from bitset_index import BITSET_FILENAME, IndexBuilder, build_index, merge_index
+from fingerprint import file_digest, load_record, save_record, value_digest
+from matrix_store import MATRIX_DIR, META_FILE, MatrixWriter
+
 # --------------------------------------------------
 # Paths
 # --------------------------------------------------
@@ -10,19 +21,18 @@ from sklearn.preprocessing import LabelEncoder
 # Define source and destination file paths
 RAW_DATA_PATH = "data/raw/dataset.csv"
 PROCESSED_DATA_PATH = "data/processed/processed_data.csv"
+VOCABULARY_PATH = "data/processed/vocabulary.json"
+SPARSE_DATA_PATH = "data/processed/processed_sparse.npz"
+SPARSE_LABELS_PATH = "data/processed/processed_labels.npy"
+PREPROCESS_CACHE_PATH = "data/processed/preprocess_cache.json"
 
-print("Loading dataset...")
-df = pd.read_csv(RAW_DATA_PATH)
+# Rows per chunk in streaming mode. Peak memory is bounded by the chunk plus the fixed-size
+# accumulators, except for the bitset index, which grows with the number of unique
+# (disease, symptom set) rows — small for real data, up to the row count for all-distinct rows
+DEFAULT_CHUNKSIZE = 100_000
 
 # --------------------------------------------------
-# Strip Whitespace from Column Names
-# --------------------------------------------------
-
-# Remove leading/trailing spaces from CSV headers
-df.columns = df.columns.str.strip()
-
-# --------------------------------------------------
-# Clean Disease Names (strip spaces + fix typos)
+# Cleaning Rules
 # --------------------------------------------------
 
 # Dictionary to standardize inconsistent disease names
@@ -34,93 +44,432 @@ disease_name_fixes = {
     "(vertigo) Paroymsal  Positional Vertigo":"(vertigo) Paroxysmal Positional Vertigo",
 }
 
-# Clean whitespace and apply name corrections to the target column
-df["Disease"] = df["Disease"].str.strip()
-df["Disease"] = df["Disease"].replace(disease_name_fixes)
 
-print(f"Unique diseases after cleaning: {df['Disease'].nunique()}")
+def clean_frame(df):
+    """Strips headers and values, fixes disease names and fills empty symptom cells"""
+    # Remove leading/trailing spaces from CSV headers
+    df.columns = df.columns.str.strip()
 
-# --------------------------------------------------
-# Clean Symptom Values (strip spaces)
-# --------------------------------------------------
+    # Clean whitespace and apply name corrections to the target column
+    df["Disease"] = df["Disease"].str.strip()
+    df["Disease"] = df["Disease"].replace(disease_name_fixes)
 
-# Identify all symptom columns (excluding 'Disease')
-symptom_columns = df.columns[1:]
+    # Remove extra spaces from every symptom entry (all columns except 'Disease')
+    for col in df.columns[1:]:
+        df[col] = df[col].str.strip()
 
-# Remove extra spaces from every symptom entry in the dataframe
-for col in symptom_columns:
-    df[col] = df[col].str.strip()
+    # Replace empty/NaN cells with a "None" string placeholder
+    df.fillna("None", inplace=True)
+    return df
 
 # --------------------------------------------------
-# Fill Missing Values
+# Derived Artifacts
 # --------------------------------------------------
 
-# Replace empty/NaN cells with a "None" string placeholder
-df.fillna("None", inplace=True)
+def save_artifacts(label_encoder, feature_columns, cooccurrence, bitset_index):
+    """Saves the encoder, feature columns and lookup structures used at inference time"""
+    # Save metadata objects for use during real-time user inference
+    os.makedirs("models", exist_ok=True)
+
+    joblib.dump(label_encoder, "models/label_encoder.pkl")
+    joblib.dump(list(feature_columns), "models/feature_columns.pkl")
+    joblib.dump(cooccurrence, "models/symptom_cooccurrence.pkl")
+    np.savez(os.path.join("models", BITSET_FILENAME), **bitset_index)
+
+    print("Label encoder saved at: models/label_encoder.pkl")
+    print("Feature columns saved at: models/feature_columns.pkl")
+    print("Co-occurrence saved at: models/symptom_cooccurrence.pkl")
+    print(f"Bitset index saved at: models/{BITSET_FILENAME} ({len(bitset_index['words'])} unique rows)")
 
 # --------------------------------------------------
-# Encode Symptoms (One-Hot Style) — Vectorized
+# In-Memory Preprocessing (default)
 # --------------------------------------------------
 
-print("Encoding symptoms...")
+def preprocess_in_memory(raw_path=RAW_DATA_PATH):
+    """Loads the whole raw CSV, encodes it and writes the processed CSV + artifacts"""
+    print("Loading dataset...")
+    df = clean_frame(pd.read_csv(raw_path))
 
-# Create a unique, sorted list of all symptoms present in the data
-all_symptoms = set()
-for col in symptom_columns:
-    all_symptoms.update(df[col].unique())
+    print(f"Unique diseases after cleaning: {df['Disease'].nunique()}")
 
-all_symptoms.discard("None")
-all_symptoms = sorted(all_symptoms)
+    # Identify all symptom columns (excluding 'Disease')
+    symptom_columns = df.columns[1:]
 
-# Initialize a new DataFrame with 0s for every possible symptom
-encoded_df = pd.DataFrame(0, index=df.index, columns=all_symptoms)
+    # --------------------------------------------------
+    # Encode Symptoms (One-Hot Style) — Vectorized
+    # --------------------------------------------------
 
-# Set value to 1 if a symptom appears in any of the original columns
-for col in symptom_columns:
-    for symptom in all_symptoms:
-        mask = df[col] == symptom
-        encoded_df.loc[mask, symptom] = 1
+    print("Encoding symptoms...")
 
-# --------------------------------------------------
-# Encode Target
-# --------------------------------------------------
+    # Create a unique, sorted list of all symptoms present in the data
+    all_symptoms = set()
+    for col in symptom_columns:
+        all_symptoms.update(df[col].unique())
+
+    all_symptoms.discard("None")
+    all_symptoms = sorted(all_symptoms)
+
+    # Initialize a new DataFrame with 0s for every possible symptom
+    encoded_df = pd.DataFrame(0, index=df.index, columns=all_symptoms)
 
-print("Encoding target (Disease)...")
+    # Set value to 1 if a symptom appears in any of the original columns
+    for col in symptom_columns:
+        for symptom in all_symptoms:
+            mask = df[col] == symptom
+            encoded_df.loc[mask, symptom] = 1
 
-# Convert text disease names into numerical integers for the model
-label_encoder = LabelEncoder()
-disease_encoded = label_encoder.fit_transform(df["Disease"])
-disease_series = pd.Series(disease_encoded, index=df.index, name="Disease")
+    # --------------------------------------------------
+    # Encode Target
+    # --------------------------------------------------
 
-print(f"Classes: {list(label_encoder.classes_)}")
+    print("Encoding target (Disease)...")
+
+    # Convert text disease names into numerical integers for the model
+    label_encoder = LabelEncoder()
+    disease_encoded = label_encoder.fit_transform(df["Disease"])
+    disease_series = pd.Series(disease_encoded, index=df.index, name="Disease")
+
+    print(f"Classes: {list(label_encoder.classes_)}")
+
+    # Merge the binary symptom features with the encoded disease labels
+    final_df = pd.concat([encoded_df, disease_series], axis=1)
+
+    # Ensure directory exists and export the cleaned CSV
+    os.makedirs("data/processed", exist_ok=True)
+    final_df.to_csv(PROCESSED_DATA_PATH, index=False)
+
+    # Count how many training rows of each disease contain each symptom
+    # (used by the app to rank the most informative next symptom)
+    cooccurrence = {
+        "counts":       encoded_df.groupby(disease_encoded).sum().to_numpy(dtype=np.int64),
+        "class_counts": np.bincount(disease_encoded, minlength=len(label_encoder.classes_)),
+    }
+
+    # Each row packed into uint64 words and grouped by disease, for fast superset queries
+    bitset_index = build_index(encoded_df.to_numpy(), disease_encoded)
+
+    print("\nPreprocessing complete!")
+    print(f"Processed data shape: {final_df.shape}")
+    print("Processed data saved at:", PROCESSED_DATA_PATH)
+    save_artifacts(label_encoder, encoded_df.columns, cooccurrence, bitset_index)
 
 # --------------------------------------------------
-# Combine Features + Target
+# Sparse Preprocessing (CSR)
 # --------------------------------------------------
 
-# Merge the binary symptom features with the encoded disease labels
-final_df = pd.concat([encoded_df, disease_series], axis=1)
+# Rows per densified block when packing the bitset index from a CSR matrix
+BITSET_BLOCK_ROWS = 100_000
+
+
+def encode_sparse(values, symptom_index):
+    """One-hot encodes a (rows x symptom slots) array of names straight into a CSR matrix"""
+    codes = symptom_index.get_indexer(values.ravel()).reshape(values.shape)
+    rows = np.broadcast_to(np.arange(len(values))[:, None], codes.shape)
+    known = codes >= 0
+
+    # Never allocates the dense (rows x vocabulary) matrix; a symptom listed twice stays 1
+    X = sparse.csr_matrix(
+        (np.ones(known.sum(), dtype=np.uint8), (rows[known], codes[known])),
+        shape=(len(values), len(symptom_index)),
+    )
+    X.sum_duplicates()
+    X.data[:] = 1
+    return X
+
+
+def preprocess_sparse(raw_path=RAW_DATA_PATH):
+    """Loads the raw CSV and writes a CSR feature matrix + labels instead of the dense CSV"""
+    print("Loading dataset...")
+    df = clean_frame(pd.read_csv(raw_path))
+    values = df.iloc[:, 1:].to_numpy()
+
+    print(f"Unique diseases after cleaning: {df['Disease'].nunique()}")
+
+    # Create a unique, sorted list of all symptoms present in the data
+    all_symptoms = pd.unique(values.ravel())
+    symptom_index = pd.Index(sorted(set(all_symptoms) - {"None"}))
+
+    print("Encoding symptoms (sparse)...")
+    X = encode_sparse(values, symptom_index)
+
+    print("Encoding target (Disease)...")
+    label_encoder = LabelEncoder()
+    disease_encoded = label_encoder.fit_transform(df["Disease"])
+
+    os.makedirs("data/processed", exist_ok=True)
+    sparse.save_npz(SPARSE_DATA_PATH, X)
+    np.save(SPARSE_LABELS_PATH, disease_encoded)
+
+    # Per-disease symptom counts as one sparse product: one-hot(labels)^T @ X
+    n_classes = len(label_encoder.classes_)
+    Y = sparse.csr_matrix(
+        (np.ones(len(disease_encoded), dtype=np.int64), (disease_encoded, np.arange(len(disease_encoded)))),
+        shape=(n_classes, len(disease_encoded)),
+    )
+    cooccurrence = {
+        "counts":       (Y @ X.astype(np.int64)).toarray(),
+        "class_counts": np.bincount(disease_encoded, minlength=n_classes),
+    }
+
+    # Pack bitsets block by block so the dense form never exists all at once
+    bitset_builder = IndexBuilder()
+    for start in range(0, X.shape[0], BITSET_BLOCK_ROWS):
+        block = slice(start, start + BITSET_BLOCK_ROWS)
+        bitset_builder.add(X[block].toarray(), disease_encoded[block])
+
+    print("\nPreprocessing complete!")
+    print(f"Sparse matrix shape: {X.shape} ({X.nnz} non-zeros, {X.nnz / np.prod(X.shape):.2%} dense)")
+    print("Sparse data saved at:", SPARSE_DATA_PATH, "+", SPARSE_LABELS_PATH)
+    save_artifacts(label_encoder, symptom_index, cooccurrence, bitset_builder.result())
 
 # --------------------------------------------------
-# Save Processed Data
+# Streaming Preprocessing (out-of-core)
 # --------------------------------------------------
 
-# Ensure directory exists and export the cleaned CSV
-os.makedirs("data/processed", exist_ok=True)
-final_df.to_csv(PROCESSED_DATA_PATH, index=False)
+def read_clean_chunks(raw_path, chunksize):
+    """Yields cleaned chunks of the raw CSV without loading the whole file"""
+    for chunk in pd.read_csv(raw_path, chunksize=chunksize, dtype=str):
+        yield clean_frame(chunk)
+
+
+def build_vocabulary(raw_path, chunksize):
+    """First pass: collects every symptom and disease name in the raw file"""
+    symptoms, diseases = set(), set()
+    n_rows, start = 0, time.perf_counter()
+
+    for chunk in read_clean_chunks(raw_path, chunksize):
+        symptoms.update(pd.unique(chunk.iloc[:, 1:].to_numpy().ravel()))
+        diseases.update(chunk["Disease"].unique())
+        n_rows += len(chunk)
+
+    symptoms.discard("None")
+    elapsed = time.perf_counter() - start
+    print(f"Vocabulary pass: {n_rows} rows in {elapsed:.1f}s ({n_rows / elapsed:,.0f} rows/s)")
+    return {"symptoms": sorted(symptoms), "diseases": sorted(diseases)}
+
+
+def encode_chunk(chunk, symptom_index, disease_index):
+    """One-hot encodes a cleaned chunk against a fixed vocabulary, returning (X, y, n_dropped)"""
+    # Rows with a disease outside the vocabulary are dropped; unknown symptoms are ignored
+    values = chunk.iloc[:, 1:].to_numpy()
+    codes = symptom_index.get_indexer(values.ravel()).reshape(values.shape)
+
+    # Scatter a 1 for every known symptom (code -1 covers "None" and unknown names)
+    X = np.zeros((len(chunk), len(symptom_index)), dtype=np.uint8)
+    rows = np.broadcast_to(np.arange(len(chunk))[:, None], codes.shape)
+    known = codes >= 0
+    X[rows[known], codes[known]] = 1
+
+    y = disease_index.get_indexer(chunk["Disease"])
+    keep = y >= 0
+    return X[keep], y[keep], int((~keep).sum())
+
+
+def preprocess_streaming(raw_path=RAW_DATA_PATH, chunksize=DEFAULT_CHUNKSIZE, vocabulary_path=None):
+    """Encodes the raw CSV chunk by chunk into the appendable on-disk matrix"""
+    print(f"Streaming {raw_path} in chunks of {chunksize} rows...")
+
+    # Pass 1 — vocabulary (skipped when one is supplied)
+    if vocabulary_path:
+        with open(vocabulary_path) as f:
+            vocabulary = json.load(f)
+        print(f"Using vocabulary from {vocabulary_path}")
+    else:
+        vocabulary = build_vocabulary(raw_path, chunksize)
+        os.makedirs(os.path.dirname(VOCABULARY_PATH), exist_ok=True)
+        with open(VOCABULARY_PATH, "w") as f:
+            json.dump(vocabulary, f)
+        print(f"Vocabulary saved at: {VOCABULARY_PATH}")
+
+    symptom_index = pd.Index(vocabulary["symptoms"])
+    disease_index = pd.Index(vocabulary["diseases"])
+    print(f"Symptoms: {len(symptom_index)}  Diseases: {len(disease_index)}")
+
+    # Fixed-size accumulators, so memory does not grow with the number of rows
+    cooccurrence = {
+        "counts":       np.zeros((len(disease_index), len(symptom_index)), dtype=np.int64),
+        "class_counts": np.zeros(len(disease_index), dtype=np.int64),
+    }
+    bitset_builder = IndexBuilder()
+    n_dropped = 0
+
+    # Pass 2 — encode and append each chunk
+    start = time.perf_counter()
+    with MatrixWriter(symptom_index, disease_index) as writer:
+        for chunk in read_clean_chunks(raw_path, chunksize):
+            X, y, dropped = encode_chunk(chunk, symptom_index, disease_index)
+            writer.append(X, y)
+            n_dropped += dropped
+
+            np.add.at(cooccurrence["counts"], y, X)
+            cooccurrence["class_counts"] += np.bincount(y, minlength=len(disease_index))
+            bitset_builder.add(X, y)
+
+            elapsed = time.perf_counter() - start
+            print(f"  {writer.n_rows:>12,} rows encoded ({writer.n_rows / elapsed:,.0f} rows/s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"Encoding pass: {writer.n_rows} rows in {elapsed:.1f}s ({writer.n_rows / elapsed:,.0f} rows/s)")
+    if n_dropped:
+        print(f"⚠  Dropped {n_dropped} row(s) with a disease outside the vocabulary")
+
+    # LabelEncoder fitted on the sorted vocabulary gives the same classes_ as the in-memory path
+    label_encoder = LabelEncoder().fit(vocabulary["diseases"])
+
+    print("\nPreprocessing complete!")
+    print(f"Matrix shape: ({writer.n_rows}, {len(symptom_index)})")
+    print("Matrix saved at:", MATRIX_DIR)
+    save_artifacts(label_encoder, symptom_index, cooccurrence, bitset_builder.result())
 
 # --------------------------------------------------
-# Save Encoder + Feature Columns
+# Incremental Runs (content-hash cache)
 # --------------------------------------------------
 
-# Save metadata objects for use during real-time user inference
-os.makedirs("models", exist_ok=True)
+# Outputs each mode must still have on disk before its cache record is trusted
+MODE_OUTPUTS = {
+    "dense":  [PROCESSED_DATA_PATH],
+    "sparse": [SPARSE_DATA_PATH, SPARSE_LABELS_PATH],
+    "stream": [os.path.join(MATRIX_DIR, META_FILE)],
+}
+ARTIFACT_PATHS = [
+    "models/label_encoder.pkl",
+    "models/feature_columns.pkl",
+    "models/symptom_cooccurrence.pkl",
+    os.path.join("models", BITSET_FILENAME),
+]
+
+
+# Code each mode's full run encodes with; appended rows always go through encode_chunk
+MODE_ENCODERS = {
+    "dense":  [preprocess_in_memory],
+    "sparse": [preprocess_sparse, encode_sparse],
+    "stream": [preprocess_streaming, encode_chunk],
+}
+
 
-joblib.dump(label_encoder, "models/label_encoder.pkl")
-joblib.dump(list(encoded_df.columns), "models/feature_columns.pkl")
+def rules_fingerprint(mode, vocabulary_path=None):
+    """Digest of everything besides the raw rows that shapes the outputs"""
+    return value_digest(
+        mode,
+        disease_name_fixes,
+        inspect.getsource(clean_frame),
+        inspect.getsource(encode_chunk),
+        [inspect.getsource(encoder) for encoder in MODE_ENCODERS[mode]],
+        file_digest(vocabulary_path) if vocabulary_path else None,
+    )
+
+
+def raw_record(raw_path):
+    """Size and content hash of the raw file, recorded after every run"""
+    size = os.path.getsize(raw_path)
+    with open(raw_path, "rb") as f:
+        f.seek(max(size - 1, 0))
+        ends_with_newline = f.read(1) == b"\n"
+    return {"raw_size": size, "raw_digest": file_digest(raw_path), "raw_ends_with_newline": ends_with_newline}
+
+
+def read_appended_rows(raw_path, offset):
+    """Parses only the rows appended after `offset` bytes, re-using the file's header line"""
+    with open(raw_path, "rb") as f:
+        header = f.readline()
+        f.seek(offset)
+        tail = f.read()
+    return clean_frame(pd.read_csv(io.BytesIO(header + tail), dtype=str))
+
+
+def append_rows(mode, df_new):
+    """Encodes appended rows with the existing vocabulary and merges them into every output"""
+    feature_columns = joblib.load("models/feature_columns.pkl")
+    label_encoder = joblib.load("models/label_encoder.pkl")
+
+    # A new symptom or disease name changes the vocabulary, which needs a full run
+    new_symptoms = set(pd.unique(df_new.iloc[:, 1:].to_numpy().ravel())) - {"None"} - set(feature_columns)
+    new_diseases = set(df_new["Disease"]) - set(label_encoder.classes_)
+    if new_symptoms or new_diseases:
+        print(f"Vocabulary changed ({len(new_symptoms)} new symptom(s), {len(new_diseases)} new disease(s)).")
+        return False
+
+    X, y, _ = encode_chunk(df_new, pd.Index(feature_columns), pd.Index(label_encoder.classes_))
+
+    if mode == "dense":
+        new_df = pd.DataFrame(X.astype(np.int64), columns=feature_columns)
+        new_df["Disease"] = y
+        new_df.to_csv(PROCESSED_DATA_PATH, mode="a", header=False, index=False)
+    elif mode == "sparse":
+        X_all = sparse.vstack([sparse.load_npz(SPARSE_DATA_PATH), sparse.csr_matrix(X)]).tocsr()
+        sparse.save_npz(SPARSE_DATA_PATH, X_all)
+        np.save(SPARSE_LABELS_PATH, np.concatenate([np.load(SPARSE_LABELS_PATH), y]))
+    else:
+        with MatrixWriter(feature_columns, label_encoder.classes_, append=True) as writer:
+            writer.append(X, y)
+
+    # Merge the new rows into the inference-time lookups instead of recounting everything
+    cooccurrence = joblib.load("models/symptom_cooccurrence.pkl")
+    np.add.at(cooccurrence["counts"], y, X)
+    cooccurrence["class_counts"] += np.bincount(y, minlength=len(label_encoder.classes_))
+    bitset_index = merge_index(dict(np.load(os.path.join("models", BITSET_FILENAME))), build_index(X, y))
+
+    print(f"\nAppended {len(y)} row(s) to the {mode} outputs.")
+    save_artifacts(label_encoder, feature_columns, cooccurrence, bitset_index)
+    return True
+
+
+def run(raw_path, mode, chunksize=DEFAULT_CHUNKSIZE, vocabulary_path=None, force=False):
+    """Skips unchanged inputs, encodes only appended rows when possible, else runs in full"""
+    rules = rules_fingerprint(mode, vocabulary_path)
+    cached = load_record(PREPROCESS_CACHE_PATH)
+    outputs_present = all(os.path.exists(path) for path in MODE_OUTPUTS[mode] + ARTIFACT_PATHS)
+
+    if cached and not force and outputs_present and cached["rules"] == rules:
+        size = os.path.getsize(raw_path)
+
+        if size == cached["raw_size"] and file_digest(raw_path) == cached["raw_digest"]:
+            print("Raw data and cleaning rules unchanged — reusing cached outputs.")
+            return
+
+        # Same bytes up to the previous end of file means rows were only appended
+        if (
+            size > cached["raw_size"]
+            and cached["raw_ends_with_newline"]
+            and file_digest(raw_path, cached["raw_size"]) == cached["raw_digest"]
+        ):
+            df_new = read_appended_rows(raw_path, cached["raw_size"])
+            print(f"{len(df_new)} appended row(s) detected — encoding only the new rows...")
+            if append_rows(mode, df_new):
+                save_record(PREPROCESS_CACHE_PATH, {"rules": rules, "mode": mode, **raw_record(raw_path)})
+                return
+
+        print("Inputs changed — running full preprocessing.")
+
+    if mode == "stream":
+        preprocess_streaming(raw_path, chunksize, vocabulary_path)
+    elif mode == "sparse":
+        preprocess_sparse(raw_path)
+    else:
+        preprocess_in_memory(raw_path)
+
+    # The mode is recorded so later stages (incremental updates) read the store it wrote
+    save_record(PREPROCESS_CACHE_PATH, {"rules": rules, "mode": mode, **raw_record(raw_path)})
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
 
-print("\nPreprocessing complete!")
-print(f"Processed data shape: {final_df.shape}")
-print("Processed data saved at:", PROCESSED_DATA_PATH)
-print("Label encoder saved at: models/label_encoder.pkl")
-print("Feature columns saved at: models/feature_columns.pkl")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean and encode the raw symptom dataset.")
+    parser.add_argument("--raw", default=RAW_DATA_PATH, help="raw CSV path")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help=f"encode out-of-core in chunks into {MATRIX_DIR} (bounded memory)",
+    )
+    parser.add_argument(
+        "--sparse", action="store_true",
+        help=f"write a CSR matrix ({SPARSE_DATA_PATH}) instead of the dense CSV",
+    )
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk in --stream mode")
+    parser.add_argument("--vocabulary", help="vocabulary JSON to reuse in --stream mode (skips the first pass)")
+    parser.add_argument("--force", action="store_true", help="ignore the cache and reprocess everything")
+    args = parser.parse_args()
+
+    mode = "stream" if args.stream else "sparse" if args.sparse else "dense"
+    run(args.raw, mode, args.chunksize, args.vocabulary, args.force)
@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import random
+import marshal
+import pstats
+import cProfile
+import threading
+from collections import Counter, deque
+
+# --------------------------------------------------
+# Settings (overridable through the environment)
+# --------------------------------------------------
+
+# The stack sampler runs from startup; it can be switched off at runtime through the admin endpoint
+ENABLED = os.environ.get("PROFILE_ENABLED", "1") != "0"
+
+# Requests at least this slow keep their stack samples
+SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 250))
+
+# Fraction of requests run under cProfile (deterministic, every call counted)
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))
+
+# Stack sampling period while requests are in flight
+INTERVAL_S = float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000
+
+# Slow requests listed by the admin endpoint
+RECENT_SLOW = 50
+
+# --------------------------------------------------
+# Stack Sampling
+# --------------------------------------------------
+
+_labels = {}
+
+
+def frame_label(code):
+    """function (file:line) for one code object, cached since the same frames repeat"""
+    label = _labels.get(code)
+    if label is None:
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def collapsed_stack(frame):
+    """Root-to-leaf frames joined by ';', the folded format flame graph tools read"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class InFlight:
+    """One profiled request: its stack samples and, if sampled, its cProfile"""
+
+    def __init__(self, endpoint, profile=None):
+        self.endpoint = endpoint
+        self.samples = Counter()
+        self.profile = profile
+
+# --------------------------------------------------
+# Request Profiler
+# --------------------------------------------------
+
+class RequestProfiler:
+    """Samples the stacks of in-flight requests; keeps them for slow requests and cProfiles a sampled fraction"""
+
+    def __init__(self, enabled=ENABLED, slow_ms=SLOW_MS, sample_rate=SAMPLE_RATE, interval_s=INTERVAL_S):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.interval_s = interval_s
+
+        self._lock = threading.Lock()
+        self._in_flight = {}                    # thread id -> InFlight
+        self._active = threading.Event()        # set while any request is in flight
+        self._profile_lock = threading.Lock()   # one cProfile at a time (the interpreter allows no more)
+
+        self.reset()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def reset(self):
+        """Drops everything aggregated so far"""
+        with self._lock:
+            self.slow_stacks = Counter()
+            self.stats = None
+            self.recent_slow = deque(maxlen=RECENT_SLOW)
+            self.counts = {"requests": 0, "slow": 0, "profiled": 0, "profile_skipped": 0, "samples": 0}
+
+    def configure(self, enabled=None, slow_ms=None, sample_rate=None):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if slow_ms is not None:
+            self.slow_ms = float(slow_ms)
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+
+    def start(self, endpoint):
+        """Called on the request's thread before the handler runs"""
+        if not self.enabled:
+            return
+
+        profile = None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            if self._profile_lock.acquire(blocking=False):
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Another profiler (a debugger, coverage) already owns the hook
+                    self._profile_lock.release()
+                    profile = None
+            if profile is None:
+                with self._lock:
+                    self.counts["profile_skipped"] += 1
+
+        with self._lock:
+            self._in_flight[threading.get_ident()] = InFlight(endpoint, profile)
+            self._active.set()
+
+    def finish(self, latency_ms, status=None):
+        """Called on the request's thread once the response is done; keeps the request's data if it qualifies"""
+        with self._lock:
+            entry = self._in_flight.pop(threading.get_ident(), None)
+            if not self._in_flight:
+                self._active.clear()
+        if entry is None:
+            return
+
+        stats = None
+        if entry.profile is not None:
+            entry.profile.disable()
+            self._profile_lock.release()
+            stats = pstats.Stats(entry.profile)
+
+        slow = latency_ms >= self.slow_ms
+        with self._lock:
+            self.counts["requests"] += 1
+            if stats is not None:
+                self.counts["profiled"] += 1
+                if self.stats is None:
+                    self.stats = stats
+                else:
+                    self.stats.add(stats)
+            if slow:
+                self.counts["slow"] += 1
+                self.slow_stacks.update(entry.samples)
+                self.recent_slow.append({
+                    "ts":         round(time.time(), 3),
+                    "endpoint":   entry.endpoint,
+                    "status":     status,
+                    "latency_ms": round(latency_ms, 3),
+                    "samples":    sum(entry.samples.values()),
+                    "top_frames": [stack.rsplit(";", 1)[-1] for stack, _ in entry.samples.most_common(3)],
+                    "profiled":   stats is not None,
+                })
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            self._sample()
+            time.sleep(self.interval_s)
+
+    def _sample(self):
+        with self._lock:
+            entries = list(self._in_flight.items())
+        frames = sys._current_frames()
+        for ident, entry in entries:
+            frame = frames.get(ident)
+            if frame is not None:
+                entry.samples[collapsed_stack(frame)] += 1
+        with self._lock:
+            self.counts["samples"] += len(entries)
+
+    def collapsed(self):
+        """Aggregated slow-request stacks, one 'frame;frame;... count' line each"""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.slow_stacks.most_common())
+
+    def pstats_bytes(self):
+        """Aggregated cProfile data in the file format pstats.Stats(path) and snakeviz load, or None"""
+        with self._lock:
+            return marshal.dumps(self.stats.stats) if self.stats is not None else None
+
+    def describe(self):
+        with self._lock:
+            return {
+                "enabled":     self.enabled,
+                "slow_ms":     self.slow_ms,
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval_s * 1000,
+                "in_flight":   len(self._in_flight),
+                **self.counts,
+                "recent_slow": list(self.recent_slow),
+            }
@@ -0,0 +1,222 @@
+import gzip
+import json
+import time
+import argparse
+from collections import Counter
+import urllib.error
+import urllib.request
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from inference import ModelBundle, parse_symptoms
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+HTTP_TIMEOUT_S = 10
+
+# Latency percentiles reported per run
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Fields of an audit record that made up the /predict request body; the rest is the server's outcome
+REQUEST_FIELDS = ("symptoms", "model", "explain")
+
+# Result of a request the server failed on (as opposed to None, a request it rejected as invalid)
+FAILED = "failed"
+
+# --------------------------------------------------
+# Request Log
+# --------------------------------------------------
+
+def read_payloads(path, limit=None):
+    """Streams /predict request bodies from a JSONL log (plain lines are taken as symptom strings)"""
+    count = 0
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payload = json.loads(line)
+            except ValueError:
+                payload = {"symptoms": line}
+            if not isinstance(payload, dict) or "symptoms" not in payload:
+                continue
+            # Audit records also cover /predict/batch and sessions; only /predict ones are replayed
+            if payload.get("endpoint", "/predict") != "/predict":
+                continue
+            yield {field: payload[field] for field in REQUEST_FIELDS if field in payload}
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+# --------------------------------------------------
+# Replay Targets
+# --------------------------------------------------
+
+class InProcessTarget:
+    """Runs payloads through a ModelBundle the way /predict does (table, then model)"""
+
+    def __init__(self, model_dir):
+        self.bundle = ModelBundle(model_dir)
+        self.name = f"{model_dir} ({self.bundle.version})"
+
+    def __call__(self, payload):
+        """Top-5 disease names for one payload, or None if it would be rejected"""
+        symptoms = payload["symptoms"]
+        if isinstance(symptoms, list):
+            symptoms = ", ".join(symptoms)
+        indices = self.bundle.resolve(parse_symptoms(str(symptoms)))[0]
+        if not indices:
+            return None
+        hit = self.bundle.lookup(indices)
+        if hit is not None:
+            top_indices = hit[0]
+        else:
+            top_indices = self.bundle.top_k(self.bundle.predict_indices([indices])[0])[0][0]
+        return self.bundle.classes[top_indices].tolist()
+
+
+class HttpTarget:
+    """Posts payloads to a running server's /predict endpoint"""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/") + "/predict"
+        self.name = self.url
+        self.failures = Counter()           # "HTTP 404", "URLError", ... -> count
+
+    def __call__(self, payload):
+        """Top-5 disease names, None if the server rejected the input (400), FAILED on any other error"""
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT_S) as response:
+                body = json.load(response)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 400:
+                return None
+            self.failures[f"HTTP {exc.code}"] += 1
+            return FAILED
+        except (urllib.error.URLError, OSError, ValueError) as exc:
+            self.failures[type(exc).__name__] += 1
+            return FAILED
+        return [entry["disease"] for entry in body.get("top5", [])] or None
+
+
+def make_target(spec):
+    """http(s)://... replays against a server, anything else is a local model directory"""
+    return HttpTarget(spec) if spec.startswith(("http://", "https://")) else InProcessTarget(spec)
+
+# --------------------------------------------------
+# Replay
+# --------------------------------------------------
+
+def timed(target, payload, scheduled=None):
+    """Runs one request; paced requests are timed from their scheduled send time, so queueing counts"""
+    start = time.perf_counter() if scheduled is None else scheduled
+    result = target(payload)
+    return result, time.perf_counter() - start
+
+
+def replay(target, payloads, rate=None, concurrency=1):
+    """Sends every payload (optionally paced at `rate` per second) and returns (results, latencies, wall s)"""
+    results, latencies = [], []
+    start = time.perf_counter()
+
+    if concurrency == 1 and rate is None:
+        for payload in payloads:
+            result, latency = timed(target, payload)
+            results.append(result)
+            latencies.append(latency)
+        return results, np.asarray(latencies), time.perf_counter() - start
+
+    # Open-loop pacing: request i is sent at start + i / rate regardless of earlier responses
+    with ThreadPoolExecutor(concurrency) as pool:
+        futures = []
+        for i, payload in enumerate(payloads):
+            scheduled = None
+            if rate is not None:
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(pool.submit(timed, target, payload, scheduled))
+        for future in futures:
+            result, latency = future.result()
+            results.append(result)
+            latencies.append(latency)
+    return results, np.asarray(latencies), time.perf_counter() - start
+
+
+def summarize(name, results, latencies, wall_s, failures=None):
+    rejected = sum(result is None for result in results)
+    errors = sum(result is FAILED for result in results)
+    print(f"\n{name}")
+    print(f"  Requests     : {len(results)} ({rejected} rejected, {errors} error(s))")
+    if failures:
+        print("  Errors       : " + ", ".join(f"{reason} x{count}" for reason, count in failures.most_common()))
+    print(f"  Throughput   : {len(results) / wall_s:,.1f} req/s over {wall_s:.2f}s")
+    values = np.percentile(latencies * 1000, PERCENTILES) if len(latencies) else [np.nan] * len(PERCENTILES)
+    print("  Latency ms   : " + ", ".join(f"p{p:g} {v:.3f}" for p, v in zip(PERCENTILES, values)))
+    return {
+        "target":       name,
+        "requests":     len(results),
+        "rejected":     rejected,
+        "errors":       errors,
+        "error_kinds":  dict(failures or {}),
+        "throughput":   len(results) / wall_s,
+        "latency_ms":   {f"p{p:g}": float(v) for p, v in zip(PERCENTILES, values)},
+    }
+
+
+def compare(results, baseline_results):
+    """Top-1 agreement and mean top-5 overlap over requests both targets answered"""
+    pairs = [(a, b) for a, b in zip(results, baseline_results) if isinstance(a, list) and isinstance(b, list)]
+    if not pairs:
+        return {"compared": 0, "top1_agreement": None, "top5_overlap": None}
+    top1 = np.mean([a[0] == b[0] for a, b in pairs])
+    overlap = np.mean([len(set(a) & set(b)) / max(len(a), len(b)) for a, b in pairs])
+    print(f"\nAgreement over {len(pairs)} request(s)")
+    print(f"  Top-1 agree  : {top1 * 100:.2f}%")
+    print(f"  Top-5 overlap: {overlap * 100:.2f}%")
+    return {"compared": len(pairs), "top1_agreement": float(top1), "top5_overlap": float(overlap)}
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a JSONL /predict request log against a model or server.")
+    parser.add_argument("log", help="JSONL file of /predict request bodies")
+    parser.add_argument("--target", default="models", help="model directory (in-process) or server URL")
+    parser.add_argument("--baseline", help="second model directory or URL to compare predictions against")
+    parser.add_argument("--rate", type=float, help="requests per second (default: as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight at once")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = {"log": args.log, "rate": args.rate, "concurrency": args.concurrency}
+    target = make_target(args.target)
+    results, latencies, wall_s = replay(target, read_payloads(args.log, args.limit), args.rate, args.concurrency)
+    report["target"] = summarize(target.name, results, latencies, wall_s, getattr(target, "failures", None))
+
+    if args.baseline:
+        baseline = make_target(args.baseline)
+        baseline_results, latencies, wall_s = replay(
+            baseline, read_payloads(args.log, args.limit), args.rate, args.concurrency,
+        )
+        report["baseline"] = summarize(
+            baseline.name, baseline_results, latencies, wall_s, getattr(baseline, "failures", None),
+        )
+        report["agreement"] = compare(results, baseline_results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved at: {args.output}")
@@ -0,0 +1,142 @@
+import os
+import gzip
+import json
+import glob
+import time
+import queue
+import shutil
+import atexit
+import threading
+
+# --------------------------------------------------
+# Settings (overridable through the environment)
+# --------------------------------------------------
+
+# Directory of the JSONL request logs ("" disables logging)
+LOG_DIR = os.environ.get("REQUEST_LOG_DIR", "logs")
+LOG_NAME = "requests.jsonl"
+
+# Records waiting for the writer; when full, new records are dropped and counted
+QUEUE_SIZE = int(os.environ.get("REQUEST_LOG_QUEUE_SIZE", 10_000))
+
+# The writer flushes after this many records or this many seconds, whichever comes first
+BATCH_SIZE = 512
+FLUSH_INTERVAL_S = 1.0
+
+# Rotate the active file at this size, keep this many rotated files, gzip them if enabled
+MAX_BYTES = int(os.environ.get("REQUEST_LOG_MAX_BYTES", 64 * 1024 * 1024))
+BACKUP_COUNT = int(os.environ.get("REQUEST_LOG_BACKUPS", 10))
+COMPRESS = os.environ.get("REQUEST_LOG_COMPRESS", "1") != "0"
+
+# --------------------------------------------------
+# Background JSONL Writer
+# --------------------------------------------------
+
+class RequestLogger:
+    """Request handlers enqueue records; one background thread batches them to rotating JSONL files"""
+
+    def __init__(self, log_dir=LOG_DIR, queue_size=QUEUE_SIZE, max_bytes=MAX_BYTES,
+                 backup_count=BACKUP_COUNT, compress=COMPRESS):
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, LOG_NAME)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.rotations = 0
+        self.write_errors = 0
+
+        os.makedirs(log_dir, exist_ok=True)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, record):
+        """Never blocks: the record is dropped (and counted) if the writer has fallen behind"""
+        try:
+            self.queue.put_nowait(record)
+            accepted = True
+        except queue.Full:
+            accepted = False
+        with self._lock:
+            if accepted:
+                self.enqueued += 1
+            else:
+                self.dropped += 1
+
+    def _run(self):
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _next_batch(self):
+        """Waits up to the flush interval for the first record, then drains up to BATCH_SIZE"""
+        try:
+            batch = [self.queue.get(timeout=FLUSH_INTERVAL_S)]
+        except queue.Empty:
+            return []
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        lines = "".join(json.dumps(record, default=str) + "\n" for record in batch)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                size = f.tell()
+            self.written += len(batch)
+            if size >= self.max_bytes:
+                self._rotate()
+        except OSError:
+            # A full or read-only disk must not take the writer thread down
+            self.write_errors += len(batch)
+
+    def _rotate(self):
+        """Renames the active file with a timestamp, gzips it if enabled, and prunes old files"""
+        # Workers sharing the directory each rotate; the pid keeps their rotated names apart
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        rotated = os.path.join(self.log_dir, f"requests-{stamp}-{os.getpid()}-{self.rotations}.jsonl")
+        try:
+            os.replace(self.path, rotated)
+        except FileNotFoundError:
+            # Another worker rotated the same file first
+            return
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        self.rotations += 1
+
+        backups = glob.glob(os.path.join(self.log_dir, "requests-*.jsonl*"))
+        backups.sort(key=lambda path: (os.path.getmtime(path), path))
+        for old in backups[:max(0, len(backups) - self.backup_count)]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+    def close(self, timeout=5):
+        """Stops the writer after it drains the queue"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def metrics(self):
+        return {
+            "queue_depth":  self.queue.qsize(),
+            "enqueued":     self.enqueued,
+            "written":      self.written,
+            "dropped":      self.dropped,
+            "write_errors": self.write_errors,
+            "rotations":    self.rotations,
+        }
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import pickle
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+from matrix_store import open_matrix
+
+# --------------------------------------------------
+# Paths & Settings
+# --------------------------------------------------
+
+# Training data written by preprocess.py (same sources as train_model.py)
+PROCESSED_DATA_PATH = "data/processed/processed_data.csv"
+SPARSE_DATA_PATH = "data/processed/processed_sparse.npz"
+SPARSE_LABELS_PATH = "data/processed/processed_labels.npy"
+
+# Memory-mapped copies of the split dataset shared by every worker process
+SEARCH_DATA_DIR = "data/processed/search"
+SEARCH_RESULTS_PATH = "models/search_results.json"
+
+# Fixed settings for every trial (mirrors train_model.py's MODEL_PARAMS)
+BASE_PARAMS = dict(
+    min_samples_split=2,
+    random_state=42,
+    class_weight="balanced",
+)
+
+# Candidate settings; every combination is a trial
+PARAM_GRID = {
+    "n_estimators":     [25, 50, 100, 200],
+    "max_depth":        [None, 10, 20],
+    "min_samples_leaf": [1, 2],
+    "max_features":     ["sqrt", 0.3],
+}
+
+# Successive halving: each round keeps the best 1/FACTOR of trials on FACTOR x more rows,
+# but never fewer than MIN_FINALISTS, so the full-data round still has a choice to make
+HALVING_FACTOR = 3
+HALVING_MIN_ROWS = 200
+HALVING_MIN_FINALISTS = 3
+
+# Single-row predict_proba calls timed per trial
+LATENCY_CALLS = 50
+
+# Rows per block when copying a (possibly sparse) matrix into the memmap
+WRITE_BLOCK_ROWS = 50_000
+
+# --------------------------------------------------
+# Load Training Data
+# --------------------------------------------------
+
+def load_training_data(source):
+    """Loads (X, y) from the processed CSV, the CSR files or the streamed matrix"""
+    if source == "matrix":
+        X, y, _ = open_matrix()
+        return X, np.asarray(y)
+    if source == "sparse":
+        return sparse.load_npz(SPARSE_DATA_PATH).tocsr(), np.load(SPARSE_LABELS_PATH)
+    df = pd.read_csv(PROCESSED_DATA_PATH)
+    return df.drop(columns="Disease").to_numpy(), df["Disease"].to_numpy()
+
+# --------------------------------------------------
+# Shared Memory-Mapped Data
+# --------------------------------------------------
+
+def write_memmap(path, X, rows):
+    """Writes X[rows] as a float32 .npy (the dtype forests train on, so workers never copy it)"""
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(len(rows), X.shape[1]))
+    for start in range(0, len(rows), WRITE_BLOCK_ROWS):
+        block = X[rows[start:start + WRITE_BLOCK_ROWS]]
+        out[start:start + WRITE_BLOCK_ROWS] = block.toarray() if sparse.issparse(block) else block
+    out.flush()
+    del out
+
+
+def prepare_shared_data(X, y, data_dir=SEARCH_DATA_DIR):
+    """Splits once and stores train/test as contiguous memmaps (train rows pre-shuffled)"""
+    os.makedirs(data_dir, exist_ok=True)
+    y = np.asarray(y)
+
+    # Stratified split of row indices; train rows are shuffled so any prefix is a random subset
+    train_idx, test_idx = train_test_split(
+        np.arange(len(y)), test_size=0.2, random_state=42, stratify=y,
+    )
+
+    write_memmap(os.path.join(data_dir, "X_train.npy"), X, train_idx)
+    write_memmap(os.path.join(data_dir, "X_test.npy"), X, test_idx)
+    np.save(os.path.join(data_dir, "y_train.npy"), y[train_idx])
+    np.save(os.path.join(data_dir, "y_test.npy"), y[test_idx])
+    return len(train_idx)
+
+
+# Per-process handles opened once by the pool initializer
+_shared = {}
+
+
+def _open_shared_data(data_dir, base_params):
+    for name in ("X_train", "X_test", "y_train", "y_test"):
+        _shared[name] = np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode="r")
+    _shared["base_params"] = base_params
+
+# --------------------------------------------------
+# Trial
+# --------------------------------------------------
+
+def run_trial(params, n_rows=None):
+    """Fits one configuration on the first n_rows training rows and measures it"""
+    X_train, y_train = _shared["X_train"], _shared["y_train"]
+    if n_rows is not None:
+        # A slice of a memmap is a view, not a copy
+        X_train, y_train = X_train[:n_rows], y_train[:n_rows]
+
+    # Parallelism comes from the process pool, so each model stays single-threaded
+    model = RandomForestClassifier(**{**_shared["base_params"], **params, "n_jobs": 1})
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    X_test, y_test = _shared["X_test"], _shared["y_test"]
+    accuracy = float((model.predict(X_test) == y_test).mean())
+
+    # Median single-row latency, the shape of a /predict call
+    rows = np.asarray(X_test[:LATENCY_CALLS])
+    timings = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        model.predict_proba(rows[i:i + 1])
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "params":       params,
+        "n_rows":       int(len(y_train)),
+        "accuracy":     accuracy,
+        "latency_ms":   float(np.median(timings) * 1000),
+        "model_kb":     len(pickle.dumps(model)) / 1024,
+        "fit_s":        fit_s,
+    }
+
+# --------------------------------------------------
+# Search Strategies
+# --------------------------------------------------
+
+def grid_candidates(grid=PARAM_GRID):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def rank_key(result, min_accuracy):
+    """Models meeting the accuracy bar first, fastest then smallest; the rest by accuracy"""
+    if result["accuracy"] >= min_accuracy:
+        return (0, result["latency_ms"], result["model_kb"])
+    return (1, -result["accuracy"], result["model_kb"])
+
+
+def grid_search(pool, candidates):
+    return list(pool.map(run_trial, candidates))
+
+
+def successive_halving(pool, candidates, n_train, min_accuracy):
+    """Evaluates all candidates on few rows, keeping the best third on 3x more rows each round"""
+    n_rows = min(n_train, max(HALVING_MIN_ROWS, n_train // HALVING_FACTOR ** 3))
+    results = []
+    while True:
+        round_results = list(pool.map(run_trial, candidates, [n_rows] * len(candidates)))
+        results.extend(round_results)
+        print(f"  round: {len(candidates):>3} trial(s) on {n_rows} rows")
+
+        if len(candidates) <= 1 or n_rows >= n_train:
+            return results
+        n_keep = max(HALVING_MIN_FINALISTS, len(candidates) // HALVING_FACTOR)
+        survivors = sorted(round_results, key=lambda r: rank_key(r, min_accuracy))[:n_keep]
+        candidates = [r["params"] for r in survivors]
+        n_rows = min(n_train, n_rows * HALVING_FACTOR)
+
+
+def run_search(X, y, base_params=BASE_PARAMS, strategy="grid", min_accuracy=0.99, n_workers=None):
+    """Runs the search over a process pool and reports the fastest model accurate enough"""
+    n_workers = n_workers or os.cpu_count()
+    print(f"\nPreparing memory-mapped data in {SEARCH_DATA_DIR}...")
+    n_train = prepare_shared_data(X, y)
+
+    candidates = grid_candidates()
+    print(f"Running {strategy} search: {len(candidates)} candidate(s) on {n_workers} worker(s)...")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(n_workers, initializer=_open_shared_data, initargs=(SEARCH_DATA_DIR, base_params)) as pool:
+        if strategy == "halving":
+            results = successive_halving(pool, candidates, n_train, min_accuracy)
+        else:
+            results = grid_search(pool, candidates)
+    elapsed = time.perf_counter() - start
+
+    # Only trials trained on the full training split are eligible
+    final = sorted((r for r in results if r["n_rows"] == n_train), key=lambda r: rank_key(r, min_accuracy))
+
+    print(f"\n{'accuracy':>9} {'latency ms':>11} {'size KB':>9} {'fit s':>7}  params")
+    for r in final:
+        print(f"{r['accuracy'] * 100:>8.2f}% {r['latency_ms']:>11.3f} {r['model_kb']:>9.0f} {r['fit_s']:>7.2f}  {r['params']}")
+
+    # The fastest model that meets the accuracy bar (falls back to the most accurate)
+    best = final[0]
+
+    print(f"\nSearch time: {elapsed:.1f}s ({len(results)} trials)")
+    print(f"Recommended (fastest with accuracy >= {min_accuracy:.0%}): {best['params']}")
+    print(f"  accuracy {best['accuracy'] * 100:.2f}%, latency {best['latency_ms']:.3f} ms, size {best['model_kb']:.0f} KB")
+
+    os.makedirs(os.path.dirname(SEARCH_RESULTS_PATH), exist_ok=True)
+    with open(SEARCH_RESULTS_PATH, "w") as f:
+        json.dump({"strategy": strategy, "min_accuracy": min_accuracy, "best": best, "trials": results}, f, indent=2)
+    print(f"Results saved at: {SEARCH_RESULTS_PATH}")
+    return best
+
+# --------------------------------------------------
+# Entry Point
+# --------------------------------------------------
+
+# Guarded so worker processes started with "spawn" (Windows/macOS) can import this module
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search for the disease model.")
+    parser.add_argument("--strategy", choices=["grid", "halving"], default="halving")
+    parser.add_argument(
+        "--source", choices=["csv", "sparse", "matrix"], default="csv",
+        help="training data written by preprocess.py (default, --sparse or --stream)",
+    )
+    parser.add_argument("--min-accuracy", type=float, default=0.99, help="accuracy bar for the recommendation")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    print("Loading processed dataset...")
+    X, y = load_training_data(args.source)
+    print(f"Dataset shape : {X.shape}")
+
+    run_search(X, y, BASE_PARAMS, args.strategy, args.min_accuracy, args.workers)
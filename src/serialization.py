@@ -0,0 +1,75 @@
+import json
+import numpy as np
+
+# Optional fast encoders — fall back to the standard library when missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# --------------------------------------------------
+# Supported Response Formats
+# --------------------------------------------------
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+FLOAT32_MIMETYPE = "application/x-float32"
+
+# Older clients still send the unregistered msgpack type
+MSGPACK_ALIASES = ("application/msgpack", "application/x-msgpack")
+
+
+def available_mimetypes():
+    """Lists the response formats this server can produce, preferred first"""
+    mimetypes = [JSON_MIMETYPE]
+    if msgpack is not None:
+        mimetypes.extend(MSGPACK_ALIASES)
+    mimetypes.append(FLOAT32_MIMETYPE)
+    return mimetypes
+
+
+def negotiate(accept_mimetypes):
+    """Picks a response format from a werkzeug Accept header (JSON by default)"""
+    best = accept_mimetypes.best_match(available_mimetypes(), default=JSON_MIMETYPE)
+    return MSGPACK_MIMETYPE if best in MSGPACK_ALIASES else best
+
+# --------------------------------------------------
+# Encoders
+# --------------------------------------------------
+
+def _to_builtin(obj):
+    """Converts NumPy values the standard encoders cannot handle"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def encode_json(payload):
+    """Encodes a payload (which may contain NumPy arrays) as UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_to_builtin, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_to_builtin, separators=(",", ":")).encode()
+
+
+def encode_msgpack(payload):
+    """Encodes a payload as MessagePack bytes"""
+    return msgpack.packb(payload, default=_to_builtin, use_bin_type=True)
+
+
+def encode_float32(proba):
+    """Encodes a probability matrix as raw little-endian float32, row-major"""
+    return np.ascontiguousarray(proba, dtype="<f4").tobytes()
+
+
+def encode(payload, mimetype):
+    """Encodes a structured payload for the negotiated (non-raw) format"""
+    if mimetype == MSGPACK_MIMETYPE:
+        return encode_msgpack(payload)
+    return encode_json(payload)
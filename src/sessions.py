@@ -0,0 +1,199 @@
+import os
+import time
+import uuid
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# --------------------------------------------------
+# Settings (overridable through the environment)
+# --------------------------------------------------
+
+# Sessions idle for longer than this are closed
+SESSION_TTL_S = float(os.environ.get("SESSION_TTL_MINUTES", 30)) * 60
+
+# Open sessions kept at most (least recently used are closed first)
+MAX_SESSIONS = int(os.environ.get("SESSION_MAX", 10_000))
+
+# Event streams open at once; each holds a server thread for as long as the client listens
+MAX_STREAMS = int(os.environ.get("SESSION_MAX_STREAMS", 100))
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_S = 15
+
+# --------------------------------------------------
+# Session
+# --------------------------------------------------
+
+class Session:
+    """One user's symptom vector, kept with the per-tree leaves it reaches and the current prediction"""
+
+    def __init__(self, session_id, bundle):
+        self.id = session_id
+        self.bundle = bundle
+        self.selected = []                  # feature indices in the order they were added
+        self.unrecognized = []
+        self.X = np.zeros((1, bundle.n_features), dtype=np.float32)
+        self.leaves = None                  # forest-wide leaf per tree, when the forest export is loaded
+        self.proba = None
+        self.trees_evaluated = 0
+        self.revision = 0
+        self.closed = False
+        self.last_seen = time.monotonic()
+
+        # Guards the vector; streams wait on it for the next revision
+        self.changed = threading.Condition()
+
+    def update(self, add=(), remove=()):
+        """Adds and removes symptoms in place and re-predicts; returns the new snapshot"""
+        with self.changed:
+            add_indices, _, unknown_added = self.bundle.resolve(add)
+            remove_indices, _, _ = self.bundle.resolve(remove)
+            self.unrecognized = list(dict.fromkeys(self.unrecognized + unknown_added))
+
+            flipped = []
+            for i in add_indices:
+                if i not in self.selected:
+                    self.selected.append(i)
+                    flipped.append(i)
+            for i in remove_indices:
+                if i in self.selected:
+                    self.selected.remove(i)
+                    flipped.append(i)
+
+            if flipped or self.revision == 0:
+                self.X[0, flipped] = 0
+                self.X[0, self.selected] = 1
+                self._predict(flipped)
+                self.revision += 1
+                self.changed.notify_all()
+            return self.snapshot()
+
+    def _predict(self, flipped):
+        if not self.selected:
+            # The next symptom starts over from a full pass
+            self.proba, self.leaves, self.trees_evaluated = None, None, 0
+            return
+
+        contributions = self.bundle.contributions
+        if contributions is None:
+            # Linear backends (and forests without the export) re-score the whole vector; it is one pass
+            self.proba = self.bundle.predict_indices([self.selected])[0]
+            self.trees_evaluated = len(getattr(self.bundle.model, "estimators_", []))
+            return
+
+        model = self.bundle.model
+        if self.leaves is None:
+            self.leaves = contributions.leaves(model, self.X)[0]
+            self.trees_evaluated = contributions.n_trees
+        else:
+            # Only trees whose current path tests a flipped symptom can reach a different leaf
+            self.leaves, self.trees_evaluated = contributions.update_leaves(model, self.X, self.leaves, flipped)
+        self.proba = contributions.predict_proba(self.leaves[None, :])[0]
+
+    def snapshot(self):
+        prediction = None
+        if self.proba is not None:
+            recognized = [self.bundle.clean_feature_columns[i] for i in self.selected]
+            prediction = self.bundle.build_result(self.proba, recognized, self.unrecognized)
+        return {
+            "session_id":      self.id,
+            "revision":        self.revision,
+            "model_version":   self.bundle.version,
+            "symptoms":        [self.bundle.clean_feature_columns[i] for i in self.selected],
+            "prediction":      prediction,
+            "trees_evaluated": self.trees_evaluated,
+        }
+
+    def current(self):
+        with self.changed:
+            return self.snapshot()
+
+    def wait(self, revision, timeout=HEARTBEAT_S):
+        """Blocks until the session moves past `revision`, is closed, or the timeout passes"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.revision != revision or self.closed, timeout)
+            return None if self.closed or self.revision == revision else self.snapshot()
+
+    def close(self):
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+
+# --------------------------------------------------
+# Session Store
+# --------------------------------------------------
+
+class SessionStore:
+    """Open sessions by id, closed after SESSION_TTL_S idle or when MAX_SESSIONS is exceeded.
+
+    Sessions live in this process's memory only, so the app must run as a single process.
+    """
+
+    def __init__(self, bundle, ttl_s=SESSION_TTL_S, max_sessions=MAX_SESSIONS, max_streams=MAX_STREAMS):
+        self.bundle = bundle
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.max_streams = max_streams
+        self._sessions = OrderedDict()      # id -> Session, least recently used first
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.streams = 0
+        self.streams_rejected = 0
+
+    def create(self, symptoms=()):
+        session = Session(uuid.uuid4().hex, self.bundle)
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            self.created += 1
+        session.update(add=symptoms)
+        return session
+
+    def get(self, session_id):
+        """The open session with this id (KeyError if unknown or expired)"""
+        with self._lock:
+            session = self._sessions[session_id]
+            if session.last_seen < time.monotonic() - self.ttl_s:
+                # Idle past the TTL, even if no create() has swept it out yet
+                del self._sessions[session_id]
+                session.close()
+                self.expired += 1
+                raise KeyError(session_id)
+            self._sessions.move_to_end(session_id)
+            session.last_seen = time.monotonic()
+            return session
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id)
+        session.close()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_s
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_seen >= cutoff and len(self._sessions) < self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            session.close()
+            self.expired += 1
+
+    def open_stream(self):
+        """Takes a stream slot; False when MAX_STREAMS are already open"""
+        with self._lock:
+            if self.streams >= self.max_streams:
+                self.streams_rejected += 1
+                return False
+            self.streams += 1
+            return True
+
+    def close_stream(self):
+        with self._lock:
+            self.streams -= 1
+
+    def metrics(self):
+        with self._lock:
+            return {"open": len(self._sessions), "created": self.created, "expired": self.expired,
+                    "streams": self.streams, "streams_rejected": self.streams_rejected}
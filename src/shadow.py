@@ -0,0 +1,137 @@
+import os
+import time
+import queue
+import random
+import threading
+import numpy as np
+from collections import deque
+
+from inference import ModelBundle
+from thread_policy import ThreadPolicy
+
+# --------------------------------------------------
+# Settings (overridable through the environment)
+# --------------------------------------------------
+
+# Candidate model directory (a models/ layout); empty disables shadow evaluation
+SHADOW_MODEL_DIR = os.environ.get("SHADOW_MODEL_DIR", "")
+
+# Worker threads running the candidate, and predictions allowed to wait for them
+WORKERS = int(os.environ.get("SHADOW_WORKERS", 1))
+QUEUE_SIZE = int(os.environ.get("SHADOW_QUEUE_SIZE", 1000))
+
+# Fraction of primary predictions mirrored to the candidate
+SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", 1.0))
+
+# Candidate latencies and disagreements kept for the metrics
+RECENT_LATENCIES = 1000
+RECENT_DISAGREEMENTS = 20
+
+# --------------------------------------------------
+# Shadow Evaluator
+# --------------------------------------------------
+
+class ShadowEvaluator:
+    """Mirrors primary predictions to a candidate model on background threads and compares the answers"""
+
+    def __init__(self, candidate, primary, workers=WORKERS, queue_size=QUEUE_SIZE, sample_rate=SAMPLE_RATE):
+        # The same index lists are handed over, so both models must read the same columns
+        if list(candidate.clean_feature_columns) != list(primary.clean_feature_columns):
+            raise ValueError(f"{candidate.model_dir}: candidate features differ from the primary model's")
+        self.candidate = candidate
+        self.primary_version = primary.version
+        self.sample_rate = sample_rate
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.counts = {"submitted": 0, "dropped": 0, "compared": 0, "errors": 0,
+                       "top1_agree": 0, "top5_overlap": 0.0, "confidence_delta": 0.0}
+        self.latencies = deque(maxlen=RECENT_LATENCIES)
+        self.disagreements = deque(maxlen=RECENT_DISAGREEMENTS)
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"shadow-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, index_lists, results):
+        """Never blocks: the comparison is dropped (and counted) when the candidate has fallen behind"""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        try:
+            self.queue.put_nowait((index_lists, results))
+            accepted = True
+        except queue.Full:
+            accepted = False
+        with self._lock:
+            self.counts["submitted" if accepted else "dropped"] += 1
+
+    def _run(self):
+        while True:
+            index_lists, results = self.queue.get()
+            try:
+                self._compare(index_lists, results)
+            except Exception:
+                # A broken candidate is a finding, not a reason to stop the worker
+                with self._lock:
+                    self.counts["errors"] += 1
+
+    def _compare(self, index_lists, results):
+        start = time.perf_counter()
+        proba = self.candidate.predict_indices(index_lists)
+        latency_ms = (time.perf_counter() - start) * 1000
+        top_indices, top_proba = self.candidate.top_k(proba)
+
+        with self._lock:
+            self.latencies.append(latency_ms)
+            for indices, primary, candidate_top, candidate_proba in zip(index_lists, results, top_indices, top_proba):
+                names = self.candidate.classes[candidate_top].tolist()
+                primary_names = [entry["disease"] for entry in primary["top5"]]
+                agree = names[0] == primary_names[0]
+
+                self.counts["compared"] += 1
+                self.counts["top1_agree"] += agree
+                self.counts["top5_overlap"] += len(set(names) & set(primary_names)) / len(primary_names)
+                self.counts["confidence_delta"] += abs(candidate_proba[0] * 100 - primary["confidence"])
+                if not agree:
+                    self.disagreements.append({
+                        "symptoms":  [self.candidate.clean_feature_columns[i] for i in indices],
+                        "primary":   {"disease": primary_names[0], "confidence": round(primary["confidence"], 2)},
+                        "candidate": {"disease": names[0], "confidence": round(float(candidate_proba[0]) * 100, 2)},
+                    })
+
+    def metrics(self):
+        with self._lock:
+            compared = self.counts["compared"] or 1
+            latencies = np.asarray(self.latencies) if self.latencies else np.zeros(1)
+            return {
+                "primary_version":       self.primary_version,
+                "candidate_version":     self.candidate.version,
+                "queue_depth":           self.queue.qsize(),
+                "submitted":             self.counts["submitted"],
+                "dropped":               self.counts["dropped"],
+                "compared":              self.counts["compared"],
+                "errors":                self.counts["errors"],
+                "top1_agreement":        round(self.counts["top1_agree"] / compared, 4),
+                "top5_overlap":          round(self.counts["top5_overlap"] / compared, 4),
+                "mean_confidence_delta": round(self.counts["confidence_delta"] / compared, 3),
+                "candidate_p50_ms":      round(float(np.percentile(latencies, 50)), 3),
+                "candidate_p99_ms":      round(float(np.percentile(latencies, 99)), 3),
+                "recent_disagreements":  list(self.disagreements),
+            }
+
+
+def load_shadow(primary, model_dir=SHADOW_MODEL_DIR):
+    """The evaluator for the configured candidate, or None when shadow mode is off or the candidate unusable"""
+    if not model_dir:
+        return None
+    try:
+        # One serial thread per prediction, so the candidate never takes the primary's batch pool
+        candidate = ModelBundle(model_dir, thread_policy=ThreadPolicy(parallel_workers=1))
+        evaluator = ShadowEvaluator(candidate, primary)
+    except (OSError, ValueError) as exc:
+        print(f"Shadow evaluation disabled: {exc}")
+        return None
+    print(f"Shadow evaluation: candidate {candidate.version} against {primary.version}")
+    return evaluator
@@ -0,0 +1,89 @@
+import os
+import numpy as np
+from scipy import sparse
+from concurrent.futures import ThreadPoolExecutor
+from threadpoolctl import threadpool_limits
+
+# --------------------------------------------------
+# Settings (overridable through the environment)
+# --------------------------------------------------
+
+# BLAS / OpenMP threads per process; request-level concurrency comes from the web server
+NATIVE_THREADS = int(os.environ.get("SERVING_NATIVE_THREADS", 1))
+
+# Batches with at least this many rows are split across worker threads
+PARALLEL_MIN_ROWS = int(os.environ.get("SERVING_PARALLEL_MIN_ROWS", 256))
+
+# Worker threads for large batches (0 = one per core)
+PARALLEL_WORKERS = int(os.environ.get("SERVING_PARALLEL_WORKERS", 0)) or os.cpu_count() or 1
+
+# --------------------------------------------------
+# Serial Forest Inference
+# --------------------------------------------------
+
+def serial_predict_proba(model, X):
+    """predict_proba on the calling thread only; forests skip joblib and input re-validation"""
+    if not hasattr(model, "estimators_"):
+        return model.predict_proba(X)
+
+    # The trees' own input format, converted once instead of once per tree
+    if sparse.issparse(X):
+        X = sparse.csr_matrix(X, dtype=np.float32)
+        X.indices = X.indices.astype(np.int32, copy=False)
+        X.indptr = X.indptr.astype(np.int32, copy=False)
+    else:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+
+    # Same accumulation order as the forest's predict_proba, so the result is identical.
+    # Leaf values are class counts before scikit-learn 1.4 (fractions after), so each tree is normalized
+    proba = np.zeros((X.shape[0], model.n_classes_))
+    for estimator in model.estimators_:
+        value = estimator.tree_.predict(X).reshape(X.shape[0], -1)[:, :model.n_classes_]
+        proba += value / value.sum(axis=1, keepdims=True)
+    proba /= len(model.estimators_)
+    return proba
+
+# --------------------------------------------------
+# Thread Policy
+# --------------------------------------------------
+
+class ThreadPolicy:
+    """Decides how many threads a prediction may use: one for requests, a pool for large batches"""
+
+    def __init__(self, native_threads=NATIVE_THREADS, parallel_min_rows=PARALLEL_MIN_ROWS,
+                 parallel_workers=PARALLEL_WORKERS):
+        self.native_threads = native_threads
+        self.parallel_min_rows = parallel_min_rows
+        self.parallel_workers = parallel_workers
+
+        # Threads are only started once a large batch arrives
+        self._pool = None
+        if parallel_workers > 1:
+            self._pool = ThreadPoolExecutor(parallel_workers, thread_name_prefix="predict")
+
+    def configure_model(self, model):
+        """Drops the training-time n_jobs so a request never fans out over every core"""
+        if hasattr(model, "n_jobs"):
+            model.n_jobs = 1
+        return model
+
+    def limit_native_threads(self):
+        """Caps BLAS / OpenMP pools for the whole process"""
+        threadpool_limits(limits=self.native_threads)
+
+    def predict_proba(self, model, X):
+        """Serial for small inputs; row chunks over the worker pool for large batches"""
+        if X.shape[0] < self.parallel_min_rows or self.parallel_workers <= 1:
+            return serial_predict_proba(model, X)
+
+        # Tree traversal releases the GIL, so row chunks run in parallel on the shared pool
+        bounds = np.linspace(0, X.shape[0], self.parallel_workers + 1, dtype=np.int64)
+        chunks = [X[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        return np.vstack(list(self._pool.map(lambda chunk: serial_predict_proba(model, chunk), chunks)))
+
+    def describe(self):
+        return {
+            "native_threads":    self.native_threads,
+            "parallel_min_rows": self.parallel_min_rows,
+            "parallel_workers":  self.parallel_workers,
+        }
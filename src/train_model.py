@@ -1,40 +1,153 @@
 import os
+import sys
+import argparse
+import sklearn
 import joblib
 import numpy as np
 import pandas as pd
+from scipy import sparse
 
 from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import (
     accuracy_score,
     classification_report,
-    confusion_matrix,
 )
 
+from backends import BACKENDS, make_model
+from build_lookup import build_and_save
+from evaluation import evaluate, save_report
+from explain import export_contributions
+from update_model import update_model
+from inference import model_version as saved_model_version, save_versioned_model
+from fingerprint import file_digest, load_record, save_record, value_digest
+from matrix_store import FEATURES_FILE, LABELS_FILE, MATRIX_DIR, META_FILE, open_matrix
+
 # --------------------------------------------------
 # Paths
 # --------------------------------------------------
 
 # Define location for processed training data and final model output
 PROCESSED_DATA_PATH = "data/processed/processed_data.csv"
+SPARSE_DATA_PATH = "data/processed/processed_sparse.npz"
+SPARSE_LABELS_PATH = "data/processed/processed_labels.npy"
 MODEL_PATH = "models/disease_model.pkl"
+MODEL_INFO_PATH = "models/model_info.json"
+TRAIN_CACHE_PATH = "models/train_cache.json"
 
 # --------------------------------------------------
-# Load Processed Dataset
+# Hyperparameters
+# --------------------------------------------------
+
+# Random Forest with 200 trees and balanced class weights
+MODEL_PARAMS = dict(
+    n_estimators=200,       # More trees = more stable predictions
+    max_depth=None,         # Let trees grow fully (data is clean/structured)
+    min_samples_split=2,
+    min_samples_leaf=1,
+    random_state=42,
+    n_jobs=-1,              # Use all CPU cores for faster training
+    class_weight="balanced",# Handles any class imbalance automatically
+)
+
+parser = argparse.ArgumentParser(description="Train the disease prediction model.")
+parser.add_argument(
+    "--matrix", action="store_true",
+    help=f"train from the on-disk matrix written by preprocess.py --stream ({MATRIX_DIR})",
+)
+parser.add_argument(
+    "--sparse", action="store_true",
+    help=f"train from the CSR matrix written by preprocess.py --sparse ({SPARSE_DATA_PATH})",
+)
+parser.add_argument(
+    "--backend", choices=BACKENDS, default="forest",
+    help="model family: the Random Forest, or a Naive Bayes / logistic model served as one sparse dot product",
+)
+parser.add_argument("--force", action="store_true", help="retrain even if inputs and settings are unchanged")
+parser.add_argument(
+    "--incremental", metavar="NEW_CASES_CSV",
+    help="grow the saved model with trees fitted on new raw-format cases instead of retraining",
+)
+parser.add_argument("--new-trees", type=int, default=50, help="trees added per --incremental update")
+parser.add_argument(
+    "--replace-oldest", action="store_true",
+    help="with --incremental, drop as many of the oldest trees as were added",
+)
+args = parser.parse_args()
+
+# --------------------------------------------------
+# Incremental Update (no full retraining)
+# --------------------------------------------------
+
+if args.incremental:
+    update_model(args.incremental, args.new_trees, args.replace_oldest)
+    print("Incremental update completed successfully!")
+    sys.exit(0)
+
+# --------------------------------------------------
+# Skip Unchanged Runs (content-hash cache)
 # --------------------------------------------------
 
-print("Loading processed dataset...")
-df = pd.read_csv(PROCESSED_DATA_PATH)
+# Everything that determines the trained model: data files, encoders and settings
+if args.matrix:
+    input_paths = [os.path.join(MATRIX_DIR, name) for name in (FEATURES_FILE, LABELS_FILE, META_FILE)]
+elif args.sparse:
+    input_paths = [SPARSE_DATA_PATH, SPARSE_LABELS_PATH]
+else:
+    input_paths = [PROCESSED_DATA_PATH]
+input_paths += ["models/label_encoder.pkl", "models/feature_columns.pkl"]
+
+train_fingerprint = value_digest(
+    [file_digest(path) for path in input_paths],
+    MODEL_PARAMS,
+    args.backend,
+    sklearn.__version__,
+)
+
+cached = load_record(TRAIN_CACHE_PATH)
+if (
+    not args.force
+    and cached is not None
+    and cached["fingerprint"] == train_fingerprint
+    and os.path.exists(MODEL_PATH)
+    and os.path.exists(MODEL_INFO_PATH)
+    and saved_model_version("models") == cached["model_version"]
+):
+    print(f"Training inputs unchanged — reusing model {cached['model_version']} at {MODEL_PATH}")
+    sys.exit(0)
 
 # --------------------------------------------------
-# Split Features and Target
+# Load Processed Dataset
 # --------------------------------------------------
 
-# Separate symptom binary features (X) from disease labels (y)
-X = df.drop("Disease", axis=1)
-y = df["Disease"]
+if args.matrix:
+    print("Loading streamed matrix...")
+    X_matrix, y_matrix, matrix_meta = open_matrix()
+
+    # uint8 features keep the in-memory copy 8x smaller than the CSV's int64 columns
+    X = pd.DataFrame(np.asarray(X_matrix), columns=matrix_meta["feature_columns"])
+    y = pd.Series(np.asarray(y_matrix), name="Disease")
+elif args.sparse:
+    print("Loading sparse dataset...")
 
-print(f"Dataset shape       : {df.shape}")
+    # Forests split CSR/CSC input natively, so the one-hot matrix is never densified
+    X = sparse.load_npz(SPARSE_DATA_PATH).tocsr()
+    y = pd.Series(np.load(SPARSE_LABELS_PATH), name="Disease")
+else:
+    print("Loading processed dataset...")
+    df = pd.read_csv(PROCESSED_DATA_PATH)
+
+    # --------------------------------------------------
+    # Split Features and Target
+    # --------------------------------------------------
+
+    # Separate symptom binary features (X) from disease labels (y)
+    X = df.drop("Disease", axis=1)
+    y = df["Disease"]
+
+# Symptom names for reporting (CSR matrices carry no column labels)
+feature_names = list(X.columns) if hasattr(X, "columns") else joblib.load("models/feature_columns.pkl")
+
+print(f"Dataset shape       : {(X.shape[0], X.shape[1] + 1)}")
 print(f"Number of features  : {X.shape[1]}")
 print(f"Number of classes   : {len(np.unique(y))}")
 print(f"Class balance       : {y.value_counts().describe()[['min','max','mean']].to_dict()}")
@@ -52,25 +165,16 @@ X_train, X_test, y_train, y_test = train_test_split(
     stratify=y,
 )
 
-print(f"\nTrain size : {len(X_train)}")
-print(f"Test size  : {len(X_test)}")
+print(f"\nTrain size : {X_train.shape[0]}")
+print(f"Test size  : {X_test.shape[0]}")
 
 # --------------------------------------------------
 # Model Training
 # --------------------------------------------------
 
-print("\nTraining Random Forest model...")
+print(f"\nTraining {args.backend} model...")
 
-# Initialize Random Forest with 200 trees and balanced class weights
-model = RandomForestClassifier(
-    n_estimators=200,       # More trees = more stable predictions
-    max_depth=None,         # Let trees grow fully (data is clean/structured)
-    min_samples_split=2,
-    min_samples_leaf=1,
-    random_state=42,
-    n_jobs=-1,              # Use all CPU cores for faster training
-    class_weight="balanced",# Handles any class imbalance automatically
-)
+model = make_model(args.backend, MODEL_PARAMS)
 
 # Fit the model to the training data
 model.fit(X_train, y_train)
@@ -79,8 +183,9 @@ model.fit(X_train, y_train)
 # Model Evaluation on Hold-Out Test Set
 # --------------------------------------------------
 
-# Generate predictions and calculate accuracy on unseen data
-y_pred = model.predict(X_test)
+# One predict_proba pass on unseen data feeds the accuracy, report and evaluation below
+proba_test = model.predict_proba(X_test)
+y_pred = model.classes_[proba_test.argmax(axis=1)]
 accuracy = accuracy_score(y_test, y_pred)
 
 print("\n================ MODEL PERFORMANCE ================")
@@ -107,6 +212,15 @@ print(
     )
 )
 
+# Confusion matrix, top-k accuracy and calibration, vectorized over the probabilities
+evaluation = evaluate(
+    np.searchsorted(model.classes_, np.asarray(y_test)),
+    proba_test,
+    label_encoder.classes_[model.classes_],
+)
+print(f"Top-k Accuracy : {', '.join(f'top-{k} {v * 100:.2f}%' for k, v in evaluation['top_k_accuracy'].items())}")
+print(f"Calibration    : ECE {evaluation['calibration']['ece']:.4f}, Brier {evaluation['calibration']['brier']:.4f}")
+
 # --------------------------------------------------
 # Stratified Cross-Validation (more reliable estimate)
 # --------------------------------------------------
@@ -128,22 +242,61 @@ print(f"Std Dev        : {cv_scores.std() * 100:.2f}%")
 
 
 
-print("\nTop 15 Most Important Symptoms:")
+# Only the forest exposes impurity-based importances
+if hasattr(model, "feature_importances_"):
+    print("\nTop 15 Most Important Symptoms:")
 
-# Calculate and display which symptoms contribute most to the model's decisions
-importances = model.feature_importances_
-indices = np.argsort(importances)[::-1][:15]
+    # Calculate and display which symptoms contribute most to the model's decisions
+    importances = model.feature_importances_
+    indices = np.argsort(importances)[::-1][:15]
 
-for rank, i in enumerate(indices, 1):
-    print(f"  {rank:>2}. {X.columns[i]:<40} {importances[i]:.4f}")
+    for rank, i in enumerate(indices, 1):
+        print(f"  {rank:>2}. {feature_names[i]:<40} {importances[i]:.4f}")
+
+    evaluation["feature_importances"] = {
+        feature_names[i]: float(importances[i]) for i in np.argsort(importances)[::-1]
+    }
 
 # --------------------------------------------------
 # Save Model
 # --------------------------------------------------
 
 # Export the final trained model for use in the prediction script
-os.makedirs("models", exist_ok=True)
-joblib.dump(model, MODEL_PATH)
+model_version = save_versioned_model(
+    model,
+    {
+        "n_features":    X.shape[1],
+        "n_classes":     len(np.unique(y)),
+        "test_accuracy": accuracy,
+    },
+)
 
 print(f"\nModel saved at: {MODEL_PATH}")
+print(f"Model version : {model_version}")
+
+# --------------------------------------------------
+# Evaluation Report
+# --------------------------------------------------
+
+# Stored next to the model so the app and dashboards read metrics instead of retraining
+evaluation["cross_validation"] = {
+    "scores": cv_scores.tolist(),
+    "mean":   float(cv_scores.mean()),
+    "std":    float(cv_scores.std()),
+}
+report_path = save_report(evaluation, model_version, "models")
+print(f"Evaluation report saved at: {report_path}")
+
+# --------------------------------------------------
+# Precomputed Prediction Table
+# --------------------------------------------------
+
+# Regenerate the single/pair lookup table so it always matches this model version
+build_and_save()
+
+# Flattened forest behind /predict explanations (forest backend)
+export_contributions(model, model_version)
+
+save_record(TRAIN_CACHE_PATH, {"fingerprint": train_fingerprint, "model_version": model_version})
+
 print("Training completed successfully!")
\ No newline at end of file
@@ -0,0 +1,236 @@
+import os
+import time
+import shutil
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+from build_lookup import build_and_save
+from evaluation import evaluate, save_report
+from explain import export_contributions
+from inference import model_version, save_versioned_model
+from fingerprint import load_record
+from matrix_store import open_matrix
+from preprocess import (
+    MODE_OUTPUTS, PREPROCESS_CACHE_PATH, PROCESSED_DATA_PATH, SPARSE_DATA_PATH, SPARSE_LABELS_PATH,
+    clean_frame, encode_chunk,
+)
+
+# --------------------------------------------------
+# Paths
+# --------------------------------------------------
+
+MODEL_DIR = "models"
+MODEL_PATH = "models/disease_model.pkl"
+VERSIONS_DIR = "models/versions"
+
+# --------------------------------------------------
+# Settings
+# --------------------------------------------------
+
+# Trees grown per update, and old processed rows replayed per disease so every
+# class is present in the update batch (sklearn refits classes_ on each fit)
+DEFAULT_NEW_TREES = 50
+DEFAULT_REPLAY_PER_CLASS = 20
+
+# Share of the new cases held out to evaluate the update; smaller batches are all used for
+# fitting and part of the replay sample is held out instead
+HOLDOUT_SIZE = 0.2
+MIN_HOLDOUT_CASES = 5
+
+# --------------------------------------------------
+# Load New Cases
+# --------------------------------------------------
+
+def load_new_cases(new_data_path, feature_columns, classes):
+    """Cleans and encodes raw-format cases with the existing vocabulary"""
+    df = clean_frame(pd.read_csv(new_data_path, dtype=str))
+
+    unknown = set(pd.unique(df.iloc[:, 1:].to_numpy().ravel())) - {"None"} - set(feature_columns)
+    if unknown:
+        print(f"⚠  Ignoring {len(unknown)} symptom(s) not in the model vocabulary: {sorted(unknown)[:10]}")
+
+    X, y, dropped = encode_chunk(df, pd.Index(feature_columns), pd.Index(classes))
+    if dropped:
+        print(f"⚠  Dropped {dropped} case(s) with a disease the model does not know (needs full retraining)")
+    return pd.DataFrame(X.astype(np.int64), columns=feature_columns), pd.Series(y, name="Disease")
+
+
+def split_holdout(X, y):
+    """(X_fit, X_holdout, y_fit, y_holdout), stratified when every class allows it; None if too few rows"""
+    if len(y) < MIN_HOLDOUT_CASES:
+        return None
+    counts = y.value_counts()
+    n_holdout = int(np.ceil(len(y) * HOLDOUT_SIZE))
+    stratified = counts.min() >= 2 and len(counts) <= min(n_holdout, len(y) - n_holdout)
+    return train_test_split(X, y, test_size=HOLDOUT_SIZE, random_state=42, stratify=y if stratified else None)
+
+
+def processed_mode():
+    """Mode of the processed store preprocess.py wrote last ("dense", "sparse", "stream"), or None"""
+    present = [mode for mode, paths in MODE_OUTPUTS.items() if all(os.path.exists(p) for p in paths)]
+    mode = (load_record(PREPROCESS_CACHE_PATH) or {}).get("mode")
+    if mode in present:
+        return mode
+
+    # Records from before the mode was stored: the most recently written store
+    return max(present, key=lambda m: os.path.getmtime(MODE_OUTPUTS[m][0]), default=None)
+
+
+def replay_sample(per_class, feature_columns, mode, seed=42):
+    """Up to `per_class` previously processed rows of every disease, read from the current store"""
+    if mode == "dense":
+        df = pd.read_csv(PROCESSED_DATA_PATH)
+        sample = df.sample(frac=1, random_state=seed).groupby("Disease").head(per_class)
+        return sample[feature_columns], sample["Disease"]
+
+    if mode == "sparse":
+        X, y = sparse.load_npz(SPARSE_DATA_PATH).tocsr(), np.load(SPARSE_LABELS_PATH)
+    else:
+        X, y, meta = open_matrix()
+        if meta["feature_columns"] != list(feature_columns):
+            raise SystemExit("❌ The on-disk matrix vocabulary differs from the model's; re-run preprocess.py.")
+
+    # Only the sampled rows are densified (the CSR / memory-mapped store stays on disk)
+    rows = pd.Series(y).sample(frac=1, random_state=seed).groupby(y).head(per_class).index.to_numpy()
+    X_rows = X[rows].toarray() if sparse.issparse(X) else np.asarray(X[rows])
+    return (
+        pd.DataFrame(X_rows.astype(np.int64), columns=feature_columns),
+        pd.Series(np.asarray(y[rows], dtype=np.int64), name="Disease"),
+    )
+
+# --------------------------------------------------
+# Incremental Update
+# --------------------------------------------------
+
+def update_model(new_data_path, n_new_trees=DEFAULT_NEW_TREES, replace_oldest=False,
+                 replay_per_class=DEFAULT_REPLAY_PER_CLASS):
+    """Grows the saved forest with trees fitted on new cases and saves it as a new version"""
+    start = time.perf_counter()
+
+    print("Loading existing model...")
+    model = joblib.load(MODEL_PATH)
+    label_encoder = joblib.load(os.path.join(MODEL_DIR, "label_encoder.pkl"))
+    feature_columns = joblib.load(os.path.join(MODEL_DIR, "feature_columns.pkl"))
+    parent_version = model_version(MODEL_DIR)
+    if not hasattr(model, "estimators_"):
+        raise SystemExit("❌ Incremental updates grow a Random Forest; retrain other backends with train_model.py.")
+    n_before = len(model.estimators_)
+
+    X_new, y_new = load_new_cases(new_data_path, feature_columns, label_encoder.classes_)
+    if len(y_new) == 0:
+        raise SystemExit("❌ No usable cases in the new data. Nothing to update.")
+
+    # Hold out part of the new cases — the only data whose predictions the update changes materially
+    split = split_holdout(X_new, y_new)
+    if split is not None:
+        X_fit, X_holdout, y_fit, y_holdout = split
+        holdout_source = "new cases"
+    else:
+        X_fit, y_fit, X_holdout, y_holdout = X_new, y_new, None, None
+
+    # Mix in replayed rows so all classes are present and the new trees do not forget them
+    mode = processed_mode()
+    if replay_per_class > 0 and mode is not None:
+        print(f"Replaying up to {replay_per_class} rows per disease from the {mode} store")
+        X_replay, y_replay = replay_sample(replay_per_class, feature_columns, mode)
+
+        # Too few new cases to spare a hold-out: hold out replayed rows (each disease keeps some to fit)
+        if X_holdout is None and y_replay.value_counts().min() >= 2:
+            split = split_holdout(X_replay, y_replay)
+            if split is not None:
+                X_replay, X_holdout, y_replay, y_holdout = split
+                holdout_source = "replay sample"
+        X_fit = pd.concat([X_fit, X_replay], ignore_index=True)
+        y_fit = pd.concat([y_fit, y_replay], ignore_index=True)
+
+    missing = set(range(len(model.classes_))) - set(y_fit)
+    if missing:
+        raise SystemExit(
+            f"❌ Update batch lacks {len(missing)} disease(s); provide processed data for replay "
+            "or use full retraining."
+        )
+    if X_holdout is None:
+        raise SystemExit("❌ Too few cases to hold any out for evaluation; provide processed data for replay.")
+
+    print(f"New cases : {len(y_new)} ({len(y_fit)} rows to fit / {len(y_holdout)} held out from the {holdout_source})")
+    old_accuracy = accuracy_score(y_holdout, model.predict(X_holdout))
+
+    # --------------------------------------------------
+    # Grow the Forest
+    # --------------------------------------------------
+
+    # "balanced" would be computed from the update batch alone; pin it to the full class counts
+    class_weight = model.class_weight
+    cooccurrence_path = os.path.join(MODEL_DIR, "symptom_cooccurrence.pkl")
+    if class_weight == "balanced" and os.path.exists(cooccurrence_path):
+        counts = joblib.load(cooccurrence_path)["class_counts"] + np.bincount(y_new, minlength=len(model.classes_))
+        model.class_weight = dict(enumerate(counts.sum() / (len(counts) * counts)))
+
+    print(f"\nFitting {n_new_trees} new trees on {len(y_fit)} rows...")
+    model.warm_start = True
+    model.n_estimators = n_before + n_new_trees
+    model.fit(X_fit, y_fit)
+    model.warm_start = False
+    model.class_weight = class_weight
+
+    # Optionally retire the oldest trees so the forest size stays constant
+    if replace_oldest:
+        model.estimators_ = model.estimators_[n_new_trees:]
+        model.n_estimators = len(model.estimators_)
+
+    proba_holdout = model.predict_proba(X_holdout)
+    new_accuracy = accuracy_score(y_holdout, model.classes_[proba_holdout.argmax(axis=1)])
+
+    print("\n================ UPDATE PERFORMANCE ================")
+    print(f"Trees          : {n_before} -> {len(model.estimators_)}")
+    print(f"Holdout Acc    : {old_accuracy * 100:.2f}% (before) -> {new_accuracy * 100:.2f}% (after)")
+
+    # --------------------------------------------------
+    # Save New Version
+    # --------------------------------------------------
+
+    # Keep the previous model so the update can be rolled back
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    shutil.copy2(MODEL_PATH, os.path.join(VERSIONS_DIR, f"disease_model-{parent_version}.pkl"))
+
+    version = save_versioned_model(
+        model,
+        {
+            "n_features":       len(feature_columns),
+            "n_classes":        len(model.classes_),
+            "parent_version":   parent_version,
+            "incremental":      True,
+            "new_cases":        int(len(y_new)),
+            "holdout_accuracy": new_accuracy,
+        },
+        MODEL_DIR,
+    )
+
+    print(f"\nPrevious model archived at: {VERSIONS_DIR}/disease_model-{parent_version}.pkl")
+    print(f"Model saved at : {MODEL_PATH}")
+    print(f"Model version  : {version} (parent {parent_version})")
+
+    # The lookup table and explanation data are tied to the model version, so they are rebuilt with it
+    build_and_save(MODEL_DIR)
+    export_contributions(model, version, MODEL_DIR)
+
+    # /evaluation serves the report of the current version; here it covers the held-out rows
+    evaluation = evaluate(
+        np.searchsorted(model.classes_, np.asarray(y_holdout)),
+        proba_holdout,
+        label_encoder.classes_[model.classes_],
+    )
+    evaluation["incremental"] = {
+        "parent_version": parent_version,
+        "holdout_rows":   int(len(y_holdout)),
+        "holdout_source": holdout_source,
+    }
+    print(f"Evaluation report saved at: {save_report(evaluation, version, MODEL_DIR)}")
+
+    print(f"\nUpdate time    : {time.perf_counter() - start:.2f}s")
+    return version